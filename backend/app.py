@@ -1,33 +1,40 @@
+import asyncio
 import base64
 import json
 import logging
 import os
 import time
 import uuid
-from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Set
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, UploadFile, File, Form, WebSocket, WebSocketDisconnect
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, UploadFile, File, Form, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from faster_whisper import WhisperModel
-
-from emotion import detect_emotion
-from intent import classify_intent
-from llm import plan_response_json, stream_reflective_response
-from mode import allowed_modes, choose_mode
-from renderer import render_from_plan
-from safety import risk_level_from_text, safety_message
-from tts import elevenlabs_tts_to_mp3
-from utils_audio import to_wav_16k_mono
+from faster_whisper.vad import get_vad_model
+
+from artifacts import ARTIFACT_GC_INTERVAL_S, ARTIFACT_TTL_S, artifact_store, parse_byte_range
+from asr import AsrScheduler, StreamingTranscript, create_asr_scheduler, transcribe_window, words_to_text
+from classifiers import classifier_cache_stats, classifier_stats
+from endpoint import VAD_ENDPOINTING, Endpointer, warm_vad
+from executors import executor_stats, run_io, run_model, shutdown_executors
+from llm import close_llm_client, llm_stats
+from metrics import ACTIVE_WEBSOCKETS, STAGE_SECONDS, Counter, Gauge, TurnTimer, observe_stages, render_metrics, stage_span
+from model_ipc import ModelClient, model_client
+from onnx_backend import active_backends
+from readiness import readiness
+from safety import RiskScanner, safety_message
+from sessions import SESSION_GC_INTERVAL_S, Session, session_store
+from speculation import SPECULATE_STABLE_MS, SPECULATIVE_TURNS, Speculation, speculation_stats
+from speech import TTS_STREAMING, SentenceSpeaker
+from tts import eleven_client
+from tts_cache import tts_cache
+from turn import FALLBACK_REPLY, turn_pipeline
+from utils_audio import StreamDecoder, decode_audio_bytes
 
 load_dotenv()
 
-BASE_DIR = Path(__file__).parent
-TMP_DIR = BASE_DIR / "tmp"
-TMP_DIR.mkdir(exist_ok=True)
 
 app = FastAPI(title="Voice-to-Voice Reflective Coach (MVP)")
 logger = logging.getLogger("uvicorn.error")
@@ -42,20 +49,85 @@ app.add_middleware(
 )
 
 
-WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL", "base")
-whisper = WhisperModel(WHISPER_MODEL_SIZE, device="auto", compute_type="int8")
+# created by startup(), in parallel with the classifier models; with MODEL_SERVER=1
+# the model server client stands in for it (same transcribe() and stats())
+asr_scheduler: AsrScheduler | ModelClient | None = model_client
+
+
+def load_whisper() -> None:
+    global asr_scheduler
+    asr_scheduler = create_asr_scheduler()
+
+
+NO_SPEECH_REPLY = "I didn't catch that. Try again closer to the mic."
+
+# read at scrape time by /metrics
+Gauge("aura_sessions", "Sessions held in the session store.", collect=lambda: {(): len(session_store)})
+Gauge(
+    "aura_executor_queue_depth",
+    "Calls waiting for a thread in each executor pool.",
+    ("pool",),
+    collect=lambda: {(pool,): s["queued"] for pool, s in executor_stats().items()},
+)
+Gauge(
+    "aura_executor_running",
+    "Calls running in each executor pool.",
+    ("pool",),
+    collect=lambda: {(pool,): s["running"] for pool, s in executor_stats().items()},
+)
+Gauge(
+    "aura_batcher_queue_depth",
+    "Requests waiting for a micro-batch.",
+    ("batcher",),
+    collect=lambda: {(name,): s["queued"] for name, s in batcher_stats().items()},
+)
+# with a model server the cache lives there; see /stats
+Counter(
+    "aura_classifier_cache_lookups_total",
+    "Intent/emotion result cache lookups by model and outcome.",
+    ("model", "result"),
+    collect=lambda: {
+        (model, result): s[plural]
+        for model, s in classifier_cache_stats()["models"].items()
+        for result, plural in (("hit", "hits"), ("miss", "misses"))
+    },
+)
+Gauge(
+    "aura_classifier_cache_entries",
+    "Results held in the intent/emotion result cache.",
+    collect=lambda: {(): classifier_cache_stats()["entries"]},
+)
+
+
+def batcher_stats() -> Dict[str, Dict[str, float]]:
+    if model_client is not None:
+        return {"model_server": model_client.stats()}
+    asr = {"asr": asr_scheduler.stats()} if asr_scheduler is not None else {}
+    return {**asr, **classifier_stats()}
+
+
+# the event loop only keeps weak references to tasks
+BACKGROUND_TASKS: Set[asyncio.Task] = set()
+
 
-SESSIONS: Dict[str, Dict[str, Any]] = {}
+def _background(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    BACKGROUND_TASKS.add(task)
+    task.add_done_callback(BACKGROUND_TASKS.discard)
+    return task
 
 
-def get_session(session_id: str) -> Dict[str, Any]:
-    session = SESSIONS.get(session_id)
-    if isinstance(session, list):
-        session = {"history": session, "last_modes": [], "last_openers": []}
-    elif not session:
-        session = {"history": [], "last_modes": [], "last_openers": []}
-    SESSIONS[session_id] = session
-    return session
+async def get_session(session_id: str) -> Session:
+    # load once per turn and pass the Session along; the shared store is a database
+    if session_store.blocking:
+        return await run_io(session_store.get, session_id)
+    return session_store.get(session_id)
+
+
+async def save_session(session: Session) -> None:
+    events = session.take_pending()
+    if events:
+        await run_io(session_store.append, session.session_id, events)
 
 
 def disallowed_openers_from_history(history: List[Dict[str, str]], last_openers: List[str]) -> List[str]:
@@ -75,14 +147,56 @@ def chunk_text(text: str, max_len: int = 18) -> List[str]:
     return [text[i : i + max_len] for i in range(0, len(text), max_len)]
 
 
-def ext_from_mime(mime_type: str) -> str:
-    if "mp4" in mime_type:
-        return "mp4"
-    if "ogg" in mime_type:
-        return "ogg"
-    if "webm" in mime_type:
-        return "webm"
-    return "webm"
+@app.on_event("startup")
+async def startup() -> None:
+    # every model loads at once and gets one dummy inference, so the first turn pays
+    # neither; Whisper is required, the others only abort startup with MODEL_FAIL_FAST.
+    # With a model server this worker only keeps the small endpointing VAD.
+    if model_client is not None:
+        await asyncio.gather(
+            readiness.load("model_server", model_client.connect, required=True),
+            readiness.load("vad", get_vad_model, warm_vad),
+        )
+    else:
+        # imported here so a worker on the model server never touches the loaders
+        from emotion import load_emotion_model, warm_emotion
+        from intent import load_intent_model, warm_intent
+
+        await asyncio.gather(
+            readiness.load("whisper", load_whisper, lambda: asr_scheduler.warm(), required=True),
+            readiness.load("intent", load_intent_model, warm_intent),
+            readiness.load("emotion", load_emotion_model, warm_emotion),
+            readiness.load("vad", get_vad_model, warm_vad),
+        )
+    readiness.started = True
+    # canned replies get their audio ahead of time (and pinned in memory), so a
+    # high-risk turn never waits on ElevenLabs; this runs in the background because
+    # it needs the network on a cold disk cache
+    _background(tts_cache.prewarm([safety_message(), FALLBACK_REPLY, NO_SPEECH_REPLY]))
+    _background(collect_periodically(artifact_store.gc, ARTIFACT_GC_INTERVAL_S, "audio artifact"))
+    _background(collect_periodically(session_store.gc, SESSION_GC_INTERVAL_S, "session"))
+    if model_client is not None:
+        _background(model_client.keep_connected())
+
+
+async def collect_periodically(collect, interval_s: float, what: str) -> None:
+    while True:
+        await asyncio.sleep(interval_s)
+        try:
+            await run_io(collect)
+        except Exception:
+            logger.exception("%s GC failed", what)
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    for task in list(BACKGROUND_TASKS):
+        task.cancel()
+    await eleven_client.aclose()
+    await close_llm_client()
+    if model_client is not None:
+        await model_client.aclose()
+    shutdown_executors()
 
 
 class TtsRequest(BaseModel):
@@ -92,38 +206,189 @@ class TtsRequest(BaseModel):
 
 async def transcribe_buffer(
     ws: WebSocket,
-    session_id: str,
-    audio_bytes: bytearray,
-    audio_ext: str,
-    last_partial: str,
-    last_transcribe_at: float,
+    decoder: StreamDecoder,
+    stream: StreamingTranscript,
     force: bool = False,
     min_interval_s: float = 0.5,
-):
+) -> Dict[str, Any] | None:
+    # returns the partial_transcript update if the transcript changed
     now = time.monotonic()
-    if not force and now - last_transcribe_at < min_interval_s:
-        return last_partial, last_transcribe_at
+    if not force and now - stream.last_transcribe_at < min_interval_s:
+        return None
+
+    stream.last_transcribe_at = now
+    previous = stream.text
+    start = time.perf_counter()
+    update = await transcribe_window(asr_scheduler, decoder, stream, final=force)
+    if update is not None:
+        # windows with no new audio return None straight away and would only skew this
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage="asr_final" if force else "asr_partial")
+    if update and update["text"] != previous:
+        await ws.send_json({"type": "partial_transcript", **update})
+        return update
+    return None
+
+
+async def synthesize_audio_url(text: str, session_id: str) -> str:
+    try:
+        audio = await tts_cache.synthesize(text)
+        name = await run_io(artifact_store.put, audio, f"{session_id}-out")
+    except Exception:
+        return ""
+    return f"/audio/{name}"
+
+
+def turn_context(session: Session, user_text: str) -> Dict[str, Any]:
+    prompt_history = session.prompt_history()
+    return {
+        "session_id": session.session_id,
+        "text": user_text,
+        "history": prompt_history,
+        "last_modes": session.last_modes,
+        "last_openers": session.last_openers,
+        "turn_index": session.turn_index,
+        "disallowed_openers": disallowed_openers_from_history(prompt_history, session.last_openers),
+    }
+
+
+async def run_safety_turn(
+    ws: WebSocket | TurnTimer,
+    session: Session,
+    user_text: str,
+    meta_extra: Dict[str, Any] | None = None,
+    stream_audio: bool = TTS_STREAMING,
+) -> None:
+    # high risk skips intent/emotion/LLM entirely; the reply's audio is prewarmed and
+    # pinned in the TTS cache, so it goes out without waiting on the network
+    session_id = session.session_id
+    await ws.send_json(
+        {
+            "type": "meta",
+            "session_id": session_id,
+            "intent": None,
+            "emotion": None,
+            "mode": "safety",
+            "risk_level": "high",
+            **(meta_extra or {}),
+        }
+    )
+    msg = safety_message()
+    if user_text:
+        session.add_message("user", user_text)
+    session.add_message("assistant", msg)
+    await save_session(session)
+    if stream_audio:
+        await ws.send_json({"type": "final", "session_id": session_id, "text": msg, "audio_url": ""})
+        speaker = SentenceSpeaker(ws.send_json, ws.send_bytes)
+        try:
+            await speaker.speak(msg)
+        except BaseException:
+            speaker.cancel()
+            raise
+        return
+    audio_url = await synthesize_audio_url(msg, session_id)
+    await ws.send_json({"type": "final", "session_id": session_id, "text": msg, "audio_url": audio_url})
 
-    if not audio_bytes:
-        return last_partial, last_transcribe_at
 
-    raw_path = TMP_DIR / f"{session_id}_stream_in.{audio_ext}"
-    wav_path = TMP_DIR / f"{session_id}_stream_in.wav"
-    raw_path.write_bytes(audio_bytes)
+async def run_turn(
+    ws: WebSocket,
+    session_id: str,
+    user_text: str,
+    meta_extra: Dict[str, Any] | None = None,
+    empty_reply: str | None = None,
+    stream_audio: bool = TTS_STREAMING,
+    ctx: Dict[str, Any] | None = None,
+    endpoint: str = "chat",
+    started: float | None = None,
+    session: Session | None = None,
+) -> None:
+    # shared by /ws/chat and /ws/stream: meta -> (safety | plan -> render) -> tokens -> final.
+    # With stream_audio, speech goes out per sentence as binary frames instead of an audio_url.
+    # ctx may come from a committed speculation, with some stages already done.
+    # started is when the turn was triggered (perf_counter), for the latency histograms.
+    ws = TurnTimer(ws, endpoint, started)
+    if session is None:
+        session = await get_session(session_id)
+    if ctx is None:
+        ctx = turn_context(session, user_text)
+    await turn_pipeline.run(ctx, ["risk"])
+    if ctx["risk"] == "high":
+        await run_safety_turn(ws, session, user_text, meta_extra, stream_audio)
+        observe_stages(ctx["timings"])
+        ws.finish()
+        return
+    await turn_pipeline.run(ctx, ["mode"])
+
+    await ws.send_json(
+        {
+            "type": "meta",
+            "session_id": session_id,
+            "intent": ctx["intent"],
+            "emotion": ctx["emotion"],
+            "mode": ctx["mode"],
+            "risk_level": ctx["risk"],
+            **(meta_extra or {}),
+        }
+    )
+
+    if not user_text and empty_reply is not None:
+        # canned, so its audio comes from the prewarmed cache
+        audio_url = await synthesize_audio_url(empty_reply, session_id)
+        await ws.send_json({"type": "final", "session_id": session_id, "text": empty_reply, "audio_url": audio_url})
+        observe_stages(ctx["timings"])
+        ws.finish()
+        return
 
-    try:
-        to_wav_16k_mono(raw_path, wav_path)
-    except Exception:
-        return last_partial, now
+    if user_text:
+        session.add_message("user", user_text)
+        await save_session(session)
 
-    segments, _info = whisper.transcribe(str(wav_path), vad_filter=True)
-    transcript = " ".join([seg.text.strip() for seg in segments]).strip()
+    speaker = SentenceSpeaker(ws.send_json, ws.send_bytes) if stream_audio else None
 
-    if transcript and transcript != last_partial:
-        await ws.send_json({"type": "partial_transcript", "text": transcript})
-        return transcript, now
+    async def emit(delta: str) -> None:
+        await ws.send_json({"type": "token", "delta": delta})
+        if speaker is not None:
+            speaker.feed(delta)
 
-    return last_partial, now
+    ctx["emit"] = emit
+    try:
+        await turn_pipeline.run(ctx, ["render"])
+        final_text = ctx["render"]
+
+        # with a streamed plan, only the part of the rendered text not already sent goes out;
+        # token_reset tells the client to drop streamed text that the final render didn't keep
+        send_start = time.perf_counter()
+        streamed = ctx["preview"].emitted if "preview" in ctx else ""
+        if not final_text.startswith(streamed):
+            await ws.send_json({"type": "token_reset"})
+            streamed = ""
+        for chunk in chunk_text(final_text[len(streamed) :]):
+            await ws.send_json({"type": "token", "delta": chunk})
+        ctx["timings"]["send"] = (time.perf_counter() - send_start) * 1000
+
+        session.add_message("assistant", final_text)
+        session.add_mode(ctx["mode"])
+        session.add_opener(ctx["opener"])
+        await save_session(session)
+
+        tts_start = time.perf_counter()
+        if speaker is not None:
+            await ws.send_json({"type": "final", "session_id": session_id, "text": final_text, "audio_url": ""})
+            await speaker.finish(final_text)
+            ctx["timings"]["tts"] = (time.perf_counter() - tts_start) * 1000
+        else:
+            audio_url = await synthesize_audio_url(final_text, session_id)
+            ctx["timings"]["tts"] = (time.perf_counter() - tts_start) * 1000
+            await ws.send_json({"type": "final", "session_id": session_id, "text": final_text, "audio_url": audio_url})
+    except BaseException:
+        # whatever fails (render, a send to a closed socket, the session write), the
+        # sentences still synthesizing must not run on for nobody
+        if speaker is not None:
+            speaker.cancel()
+        raise
+    observe_stages(ctx["timings"])
+    ws.finish()
+    logger.debug("turn %s stage timings (ms): %s", session_id, ctx["timings"])
 
 
 @app.post("/transcribe")
@@ -131,23 +396,20 @@ async def transcribe(audio: UploadFile = File(...), session_id: str = Form(defau
     if not session_id:
         session_id = str(uuid.uuid4())
 
-    ext = (audio.filename.split(".")[-1] if audio.filename else "webm").lower()
-    raw_path = TMP_DIR / f"{session_id}_in.{ext}"
-    wav_path = TMP_DIR / f"{session_id}_in.wav"
-
-    with raw_path.open("wb") as f:
-        f.write(await audio.read())
-
+    data = await audio.read()
     try:
-        to_wav_16k_mono(raw_path, wav_path)
+        with stage_span("decode"):
+            samples = await run_model(decode_audio_bytes, data)
     except Exception as e:
-        return JSONResponse({"error": f"Audio convert failed (ffmpeg). {e}", "session_id": session_id}, status_code=400)
+        return JSONResponse({"error": f"Audio decode failed. {e}", "session_id": session_id}, status_code=400)
 
-    segments, _info = whisper.transcribe(str(wav_path), vad_filter=True)
-    transcript = " ".join([seg.text.strip() for seg in segments]).strip()
+    with stage_span("asr"):
+        words = await asr_scheduler.transcribe(samples, final=True)
+    transcript = words_to_text(words)
 
-    session = get_session(session_id)
-    session["history"].append({"role": "user", "content": transcript or "[unintelligible]"})
+    session = await get_session(session_id)
+    session.add_message("user", transcript or "[unintelligible]")
+    await save_session(session)
     return {"session_id": session_id, "transcript": transcript}
 
 
@@ -158,11 +420,10 @@ async def tts(payload: TtsRequest):
         return JSONResponse({"error": "Missing text"}, status_code=400)
 
     session_id = payload.session_id or str(uuid.uuid4())
-    out_name = f"{session_id}-{int(time.time())}.mp3"
-    out_path = TMP_DIR / out_name
 
     try:
-        elevenlabs_tts_to_mp3(text, out_path)
+        audio = await tts_cache.synthesize(text)
+        out_name = await run_io(artifact_store.put, audio, session_id)
     except Exception as exc:
         logger.exception("TTS generation failed")
         return JSONResponse({"error": "TTS generation failed", "details": str(exc)}, status_code=502)
@@ -171,89 +432,89 @@ async def tts(payload: TtsRequest):
 
 
 @app.get("/audio/{filename}")
-def get_audio(filename: str):
-    path = TMP_DIR / filename
-    if not path.exists():
+async def get_audio(filename: str, request: Request):
+    artifact = await run_io(artifact_store.get, filename)
+    if artifact is None:
         return JSONResponse({"error": "Audio not found"}, status_code=404)
-    return FileResponse(path, media_type="audio/mpeg")
-
 
-@app.websocket("/ws/chat")
-async def ws_chat(ws: WebSocket):
-    await ws.accept()
+    # names are never reused, so a fetched clip can be cached until it expires
+    headers = {
+        "ETag": artifact.etag,
+        "Cache-Control": f"private, max-age={int(ARTIFACT_TTL_S)}, immutable",
+        "Accept-Ranges": "bytes",
+    }
+    if artifact.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    span = None
+    range_header = request.headers.get("range")
+    if range_header and request.headers.get("if-range", artifact.etag) == artifact.etag:
+        try:
+            span = parse_byte_range(range_header, artifact.size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{artifact.size}"
+            return Response(status_code=416, headers=headers)
+
+    start, end = span or (0, artifact.size - 1)
+    try:
+        body = await run_io(artifact_store.read, artifact, start, end)
+    except FileNotFoundError:
+        return JSONResponse({"error": "Audio not found"}, status_code=404)
+    if span is None:
+        return Response(body, media_type=artifact.media_type, headers=headers)
+    headers["Content-Range"] = f"bytes {start}-{end}/{artifact.size}"
+    return Response(body, status_code=206, media_type=artifact.media_type, headers=headers)
+
+
+@app.get("/stats")
+async def stats():
+    return {
+        "executors": executor_stats(),
+        "batchers": batcher_stats(),
+        "classifier_backends": active_backends,
+        "classifier_cache": classifier_cache_stats(),
+        "tts_cache": tts_cache.stats(),
+        "llm_connections": llm_stats(),
+        "sessions": await run_io(session_store.stats),
+        "artifacts": artifact_store.stats(),
+        "speculation": speculation_stats.stats(),
+        **({"model_server": await model_server_health()} if model_client is not None else {}),
+    }
+
+
+async def model_server_health() -> Dict[str, Any]:
     try:
-        while True:
-            payload = await ws.receive_json()
-            session_id = payload.get("session_id") or str(uuid.uuid4())
-            user_text = (payload.get("user_text") or "").strip()
-
-            session = get_session(session_id)
-            history = session["history"]
-            last_modes = session["last_modes"]
-            last_openers = session["last_openers"]
-            prompt_history = history[-10:]
-
-            risk = risk_level_from_text(user_text)
-            intent = classify_intent(user_text) if user_text else "other"
-            emotion = detect_emotion(user_text)
-            allowed = allowed_modes(intent, emotion)
-            turn_index = sum(1 for m in history if m.get("role") == "user")
-            mode = choose_mode(allowed, last_modes, seed=f"{session_id}:{turn_index}")
+        return await asyncio.wait_for(model_client.health(), 2.0)
+    except Exception as exc:
+        return {"error": f"{type(exc).__name__}: {exc}"}
 
-            await ws.send_json(
-                {
-                    "type": "meta",
-                    "session_id": session_id,
-                    "intent": intent,
-                    "emotion": emotion,
-                    "mode": mode,
-                    "risk_level": risk,
-                }
-            )
 
-            if user_text:
-                history.append({"role": "user", "content": user_text})
+@app.get("/ready")
+def ready():
+    # for load balancers: 200 once every model is loaded and warmed (or the model server
+    # is connected), 503 until then or while that connection is down
+    ok = readiness.ready and (model_client is None or model_client.connected)
+    return JSONResponse(readiness.status(), status_code=200 if ok else 503)
 
-            if risk == "high":
-                msg = safety_message()
-                history.append({"role": "assistant", "content": msg})
 
-                out_name = f"{session_id}_out.mp3"
-                out_path = TMP_DIR / out_name
-                audio_url = ""
-                try:
-                    elevenlabs_tts_to_mp3(msg, out_path)
-                    audio_url = f"/audio/{out_name}"
-                except Exception:
-                    audio_url = ""
-
-                await ws.send_json({"type": "final", "session_id": session_id, "text": msg, "audio_url": audio_url})
-                continue
-
-            disallowed_openers = disallowed_openers_from_history(prompt_history, last_openers)
-            plan = plan_response_json(prompt_history, user_text, intent, emotion, mode, disallowed_openers)
-            final_text = render_from_plan(plan, mode, intent, emotion, last_openers).strip()
-            if not final_text:
-                final_text = "I hear you. What feels like the hardest part of this right now?"
-
-            for chunk in chunk_text(final_text):
-                await ws.send_json({"type": "token", "delta": chunk})
-
-            history.append({"role": "assistant", "content": final_text})
-            last_modes.append(mode)
-            if len(last_modes) > 5:
-                del last_modes[:-5]
-
-            out_name = f"{session_id}_out.mp3"
-            out_path = TMP_DIR / out_name
-            audio_url = ""
-            try:
-                elevenlabs_tts_to_mp3(final_text, out_path)
-                audio_url = f"/audio/{out_name}"
-            except Exception:
-                audio_url = ""
+@app.get("/metrics")
+def metrics():
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
-            await ws.send_json({"type": "final", "session_id": session_id, "text": final_text, "audio_url": audio_url})
+
+@app.websocket("/ws/chat")
+async def ws_chat(ws: WebSocket):
+    await ws.accept()
+    try:
+        with ACTIVE_WEBSOCKETS.track(endpoint="chat"):
+            while True:
+                payload = await ws.receive_json()
+                started = time.perf_counter()
+                session_id = payload.get("session_id") or str(uuid.uuid4())
+                user_text = (payload.get("user_text") or "").strip()
+
+                stream_audio = bool(payload.get("stream_audio", TTS_STREAMING))
+                await run_turn(ws, session_id, user_text, stream_audio=stream_audio, started=started)
 
     except WebSocketDisconnect:
         return
@@ -262,171 +523,186 @@ async def ws_chat(ws: WebSocket):
 @app.websocket("/ws/stream")
 async def ws_stream(ws: WebSocket):
     # Client -> start/end control messages + binary audio chunks
-    # Server -> partial_transcript, meta, token, final
+    # Server -> partial_transcript, meta, token (+ token_reset), final
+    #           (+ audio header/binary frame pairs and audio_end when "start" sets stream_audio)
+    # A high-risk phrase in a partial transcript answers with the safety reply right
+    # away (meta carries "interrupted": true); the rest of that utterance is ignored.
+    # With SPECULATIVE_TURNS, a partial transcript that stops changing starts the turn's
+    # classifiers and plan early; end_of_speech reuses them if the final text matches.
+    # With server endpointing ("server_endpointing" on start, or VAD_ENDPOINTING), the
+    # server sends {"type": "end_of_turn"} after trailing silence and runs the turn
+    # itself; the client should stop recording and send "start" for the next utterance.
     await ws.accept()
 
     session_id = ""
-    audio_ext = "webm"
-    audio_bytes = bytearray()
-    last_partial = ""
-    last_transcribe_at = 0.0
+    stream_audio = TTS_STREAMING
+    endpointing = VAD_ENDPOINTING
+    decoder: StreamDecoder | None = None
+    endpointer: Endpointer | None = None
+    stream = StreamingTranscript()
+    scanner = RiskScanner()
+    # the utterance was already answered (safety interrupt or server endpoint):
+    # drop its remaining audio and the client's end_of_speech
+    answered = False
+    speculation: Speculation | None = None
+    last_change = time.monotonic()
+
+    def drop_speculation() -> None:
+        nonlocal speculation
+        if speculation is not None:
+            speculation.cancel()
+            speculation = None
+
+    async def maybe_speculate() -> None:
+        nonlocal speculation
+        partial = stream.text.strip()
+        if not SPECULATIVE_TURNS or speculation is not None or not partial:
+            return
+        if (time.monotonic() - last_change) * 1000 >= SPECULATE_STABLE_MS:
+            session = await get_session(session_id)
+            if speculation is None:
+                speculation = Speculation(partial, turn_context(session, partial))
+
+    def reset_utterance() -> None:
+        nonlocal stream, scanner, endpointer, last_change
+        stream = StreamingTranscript()
+        scanner = RiskScanner()
+        endpointer = None
+        last_change = time.monotonic()
+
+    async def end_utterance() -> None:
+        nonlocal session_id, decoder, speculation
+        started = time.perf_counter()
+        if not session_id:
+            session_id = str(uuid.uuid4())
+        if decoder is not None:
+            with stage_span("stream_decode"):
+                await run_io(decoder.finish)
+            await transcribe_buffer(ws, decoder, stream, force=True)
+            await run_io(decoder.close)
+            decoder = None
+
+        final_transcript = stream.text.strip()
+        reset_utterance()
+        ctx = None
+        session = await get_session(session_id)
+        if speculation is not None and final_transcript:
+            pending, speculation = speculation, None
+            ctx = await pending.commit(final_transcript, session.turn_index)
+        drop_speculation()
+        await run_turn(
+            ws,
+            session_id,
+            final_transcript,
+            meta_extra={"transcript": final_transcript},
+            empty_reply=NO_SPEECH_REPLY,
+            stream_audio=stream_audio,
+            ctx=ctx,
+            endpoint="stream",
+            started=started,
+            session=session,
+        )
+
+    async def on_audio(chunk: bytes) -> None:
+        nonlocal session_id, decoder, endpointer, answered, last_change
+        if answered:
+            return
+        if not session_id:
+            session_id = str(uuid.uuid4())
+        if decoder is None:
+            decoder = await run_io(StreamDecoder)
+        with stage_span("stream_decode"):
+            await run_io(decoder.feed, chunk)
+        update = await transcribe_buffer(ws, decoder, stream)
+        if update is None:
+            await maybe_speculate()
+        else:
+            last_change = time.monotonic()
+            if speculation is not None and speculation.text != stream.text.strip():
+                drop_speculation()
+            level, pattern = scanner.feed(update["stable"], update["tentative"])
+            if level == "high":
+                drop_speculation()
+                answered = True
+                partial = stream.text.strip()
+                meta = {"transcript": partial, "interrupted": True, "matched": pattern}
+                timer = TurnTimer(ws, "stream")
+                await run_safety_turn(timer, await get_session(session_id), partial, meta, stream_audio)
+                timer.finish()
+                return
+
+        if not endpointing:
+            return
+        if endpointer is None:
+            endpointer = Endpointer()
+        with stage_span("vad"):
+            endpointed = await run_model(endpointer.update, decoder)
+        if endpointed:
+            answered = True
+            await ws.send_json(
+                {"type": "end_of_turn", "reason": "vad", "silence_ms": round(endpointer.trailing_silence_ms)}
+            )
+            await end_utterance()
 
     try:
-        while True:
-            message = await ws.receive()
-            if message.get("type") == "websocket.disconnect":
-                break
-            text = message.get("text")
-            data_bytes = message.get("bytes")
-
-            if data_bytes:
-                if not session_id:
-                    session_id = str(uuid.uuid4())
-                audio_bytes.extend(data_bytes)
-                last_partial, last_transcribe_at = await transcribe_buffer(
-                    ws,
-                    session_id,
-                    audio_bytes,
-                    audio_ext,
-                    last_partial,
-                    last_transcribe_at,
-                )
-                continue
-
-            if not text:
-                continue
-
-            try:
-                payload = json.loads(text)
-            except json.JSONDecodeError:
-                continue
-
-            msg_type = payload.get("type")
-
-            if msg_type == "start":
-                session_id = payload.get("session_id") or str(uuid.uuid4())
-                mime_type = payload.get("mime_type", "")
-                audio_ext = payload.get("ext") or ext_from_mime(mime_type)
-                audio_bytes = bytearray()
-                last_partial = ""
-                last_transcribe_at = 0.0
-                get_session(session_id)
-                continue
-
-            if msg_type == "audio_chunk":
-                chunk_b64 = payload.get("chunk")
-                if chunk_b64:
-                    try:
-                        audio_bytes.extend(base64.b64decode(chunk_b64))
-                    except Exception:
-                        continue
-                    last_partial, last_transcribe_at = await transcribe_buffer(
-                        ws,
-                        session_id or str(uuid.uuid4()),
-                        audio_bytes,
-                        audio_ext,
-                        last_partial,
-                        last_transcribe_at,
-                    )
-                continue
-
-            if msg_type == "end_of_speech":
-                if not session_id:
-                    session_id = str(uuid.uuid4())
-                session = get_session(session_id)
-                history = session["history"]
-                last_modes = session["last_modes"]
-                last_openers = session["last_openers"]
-                prompt_history = history[-10:]
-
-                last_partial, last_transcribe_at = await transcribe_buffer(
-                    ws,
-                    session_id,
-                    audio_bytes,
-                    audio_ext,
-                    last_partial,
-                    last_transcribe_at,
-                    force=True,
-                )
-
-                final_transcript = last_partial.strip()
-                if final_transcript:
-                    history.append({"role": "user", "content": final_transcript})
-
-                risk = risk_level_from_text(final_transcript)
-                intent = classify_intent(final_transcript) if final_transcript else "other"
-                emotion = detect_emotion(final_transcript)
-                allowed = allowed_modes(intent, emotion)
-                turn_index = sum(1 for m in history if m.get("role") == "user")
-                mode = choose_mode(allowed, last_modes, seed=f"{session_id}:{turn_index}")
-
-                await ws.send_json(
-                    {
-                        "type": "meta",
-                        "session_id": session_id,
-                        "intent": intent,
-                        "emotion": emotion,
-                        "mode": mode,
-                        "risk_level": risk,
-                        "transcript": final_transcript,
-                    }
-                )
-
-                if not final_transcript:
-                    await ws.send_json(
-                        {
-                            "type": "final",
-                            "session_id": session_id,
-                            "text": "I didn't catch that. Try again closer to the mic.",
-                            "audio_url": "",
-                        }
-                    )
+        with ACTIVE_WEBSOCKETS.track(endpoint="stream"):
+            while True:
+                message = await ws.receive()
+                if message.get("type") == "websocket.disconnect":
+                    break
+                text = message.get("text")
+                data_bytes = message.get("bytes")
+
+                if data_bytes:
+                    await on_audio(data_bytes)
                     continue
 
-                if risk == "high":
-                    msg = safety_message()
-                    history.append({"role": "assistant", "content": msg})
-
-                    out_name = f"{session_id}_out.mp3"
-                    out_path = TMP_DIR / out_name
-                    audio_url = ""
-                    try:
-                        elevenlabs_tts_to_mp3(msg, out_path)
-                        audio_url = f"/audio/{out_name}"
-                    except Exception:
-                        audio_url = ""
-
-                    await ws.send_json(
-                        {"type": "final", "session_id": session_id, "text": msg, "audio_url": audio_url}
-                    )
+                if not text:
                     continue
 
-                disallowed_openers = disallowed_openers_from_history(prompt_history, last_openers)
-                plan = plan_response_json(prompt_history, final_transcript, intent, emotion, mode, disallowed_openers)
-                final_text = render_from_plan(plan, mode, intent, emotion, last_openers).strip()
-                if not final_text:
-                    final_text = "I hear you. What feels like the hardest part of this right now?"
-
-                for chunk in chunk_text(final_text):
-                    await ws.send_json({"type": "token", "delta": chunk})
+                try:
+                    payload = json.loads(text)
+                except json.JSONDecodeError:
+                    continue
 
-                history.append({"role": "assistant", "content": final_text})
-                last_modes.append(mode)
-                if len(last_modes) > 5:
-                    del last_modes[:-5]
+                msg_type = payload.get("type")
+
+                if msg_type == "start":
+                    session_id = payload.get("session_id") or str(uuid.uuid4())
+                    stream_audio = bool(payload.get("stream_audio", TTS_STREAMING))
+                    endpointing = bool(payload.get("server_endpointing", VAD_ENDPOINTING))
+                    if decoder is not None:
+                        await run_io(decoder.close)
+                    decoder = await run_io(StreamDecoder)
+                    reset_utterance()
+                    answered = False
+                    drop_speculation()
+                    await get_session(session_id)
+                    continue
 
-                out_name = f"{session_id}_out.mp3"
-                out_path = TMP_DIR / out_name
-                audio_url = ""
-                try:
-                    elevenlabs_tts_to_mp3(final_text, out_path)
-                    audio_url = f"/audio/{out_name}"
-                except Exception:
-                    audio_url = ""
+                if msg_type == "audio_chunk":
+                    chunk_b64 = payload.get("chunk")
+                    if chunk_b64:
+                        try:
+                            chunk = base64.b64decode(chunk_b64)
+                        except Exception:
+                            continue
+                        await on_audio(chunk)
+                    continue
 
-                await ws.send_json(
-                    {"type": "final", "session_id": session_id, "text": final_text, "audio_url": audio_url}
-                )
+                if msg_type == "end_of_speech":
+                    if answered:
+                        answered = False
+                        if decoder is not None:
+                            await run_io(decoder.close)
+                            decoder = None
+                        reset_utterance()
+                        continue
+                    await end_utterance()
 
     except WebSocketDisconnect:
         return
+    finally:
+        drop_speculation()
+        if decoder is not None:
+            await run_io(decoder.close)
@@ -0,0 +1,246 @@
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from stat import S_ISREG
+from typing import Dict, List, Optional, Tuple
+
+ARTIFACT_DIR = Path(os.getenv("ARTIFACT_DIR", str(Path(__file__).parent / "tmp")))
+# clips are fetched once or twice right after a turn; nothing needs them for long
+ARTIFACT_TTL_S = float(os.getenv("ARTIFACT_TTL_S", "3600"))
+ARTIFACT_DISK_MB = float(os.getenv("ARTIFACT_DISK_MB", "256"))
+# several workers (uvicorn --workers / WEB_CONCURRENCY, or the multi-worker session and
+# model settings) share the directory; a per-process memory copy buys nothing there
+_MULTI_WORKER = (
+    int(os.getenv("WEB_CONCURRENCY", "1")) > 1
+    or os.getenv("SESSION_BACKEND", "memory") == "sqlite"
+    or os.getenv("MODEL_SERVER", "0") == "1"
+)
+# clips up to ARTIFACT_MEMORY_CLIP_KB are also kept in memory, up to ARTIFACT_MEMORY_MB
+# (0 disables; the default with several workers)
+ARTIFACT_MEMORY_MB = float(os.getenv("ARTIFACT_MEMORY_MB", "0" if _MULTI_WORKER else "64"))
+ARTIFACT_MEMORY_CLIP_KB = float(os.getenv("ARTIFACT_MEMORY_CLIP_KB", "512"))
+ARTIFACT_GC_INTERVAL_S = float(os.getenv("ARTIFACT_GC_INTERVAL_S", "60"))
+
+MEDIA_TYPES = {"mp3": "audio/mpeg", "wav": "audio/wav", "webm": "audio/webm"}
+# session ids come from clients and end up in file names
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9_-]")
+
+
+def parse_byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    # single "bytes=a-b" / "bytes=a-" / "bytes=-n" range -> inclusive (start, end).
+    # None means serve the whole body (malformed or multi-range); ValueError means 416.
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0:
+                raise ValueError("empty suffix range")
+            return max(0, size - suffix), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        if first.isdigit() or not first:
+            raise
+        return None
+    if start >= size:
+        raise ValueError("range starts past the end")
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+class Artifact:
+    __slots__ = ("name", "size", "etag", "created", "data")
+
+    def __init__(self, name: str, size: int, etag: str, created: float, data: Optional[bytes] = None):
+        self.name = name
+        self.size = size
+        self.etag = etag
+        self.created = created
+        self.data = data
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES.get(self.name.rsplit(".", 1)[-1], "application/octet-stream")
+
+
+class ArtifactStore:
+    # Generated audio served by /audio/{name}. Every put() gets a fresh name, so two
+    # overlapping turns of one session never write the same file. The directory is
+    # the store: every clip is written there, so any worker can serve any clip, and
+    # gc() ages out and evicts by what is on disk, whichever worker wrote it. Small
+    # clips this process wrote are also kept in a memory LRU (memory_bytes, 0 to
+    # disable) so the fetch right after a turn skips the file read.
+    # Blocking: call through run_io from the event loop.
+
+    def __init__(
+        self,
+        directory: Path = ARTIFACT_DIR,
+        ttl_s: float = ARTIFACT_TTL_S,
+        disk_bytes: int = int(ARTIFACT_DISK_MB * 1024 * 1024),
+        memory_bytes: int = int(ARTIFACT_MEMORY_MB * 1024 * 1024),
+        memory_clip_bytes: int = int(ARTIFACT_MEMORY_CLIP_KB * 1024),
+    ):
+        self.directory = directory
+        self.ttl_s = ttl_s
+        self.disk_bytes = disk_bytes
+        self.memory_bytes = memory_bytes
+        self.memory_clip_bytes = memory_clip_bytes
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Artifact]" = OrderedDict()
+        self._memory_size = 0
+        # directory totals as of the last gc() plus what this process wrote since
+        self._disk_entries = 0
+        self._disk_size = 0
+        self._counts = {"puts": 0, "memory_hits": 0, "disk_hits": 0, "expired": 0, "evicted": 0}
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.gc()
+
+    def _path(self, name: str) -> Path:
+        return self.directory / name
+
+    def put(self, data: bytes, prefix: str, ext: str = "mp3") -> str:
+        prefix = _UNSAFE_NAME.sub("", prefix)[:64] or "clip"
+        name = f"{prefix}-{uuid.uuid4().hex[:12]}.{ext}"
+        artifact = self._artifact(name, self._write(name, data))
+        with self._lock:
+            self._counts["puts"] += 1
+            self._disk_entries += 1
+            self._disk_size += len(data)
+            over_quota = self._disk_size > self.disk_bytes
+            if 0 < len(data) <= min(self.memory_clip_bytes, self.memory_bytes):
+                artifact.data = data
+                self._memory[name] = artifact
+                self._memory_size += len(data)
+                self._trim_memory()
+        if over_quota:
+            self.gc()
+        return name
+
+    def _write(self, name: str, data: bytes) -> os.stat_result:
+        path = self._path(name)
+        tmp = path.with_name(path.name + ".part")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+        return path.stat()
+
+    @staticmethod
+    def _artifact(name: str, stat: os.stat_result) -> Artifact:
+        # derived from the file, so every worker hands out the same ETag for a clip
+        return Artifact(name, stat.st_size, f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"', stat.st_mtime)
+
+    def _trim_memory(self) -> None:
+        # caller holds the lock; the clips stay on disk
+        while self._memory_size > self.memory_bytes and self._memory:
+            _name, artifact = self._memory.popitem(last=False)
+            self._memory_size -= artifact.size
+
+    def _forget(self, name: str) -> None:
+        # caller holds the lock
+        artifact = self._memory.pop(name, None)
+        if artifact is not None:
+            self._memory_size -= artifact.size
+
+    def get(self, name: str) -> Optional[Artifact]:
+        now = time.time()
+        with self._lock:
+            artifact = self._memory.get(name)
+            if artifact is not None:
+                if now - artifact.created > self.ttl_s:
+                    self._forget(name)
+                    return None
+                self._memory.move_to_end(name)
+                self._counts["memory_hits"] += 1
+                return artifact
+        # written by another worker, spilled from memory, or left by an earlier run
+        if name.startswith(".") or name.endswith(".part") or Path(name).name != name:
+            return None
+        try:
+            stat = self._path(name).stat()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if not S_ISREG(stat.st_mode) or now - stat.st_mtime > self.ttl_s:
+            return None
+        with self._lock:
+            self._counts["disk_hits"] += 1
+        return self._artifact(name, stat)
+
+    def read(self, artifact: Artifact, start: int = 0, end: Optional[int] = None) -> bytes:
+        # bytes [start, end] inclusive, as in a Range header
+        stop = artifact.size if end is None else end + 1
+        data = artifact.data
+        if data is not None:
+            return data[start:stop]
+        with open(self._path(artifact.name), "rb") as f:
+            f.seek(start)
+            return f.read(stop - start)
+
+    def gc(self) -> int:
+        # every worker may run this over the same directory; a file another worker
+        # already removed is simply skipped
+        now = time.time()
+        files = []
+        for path in self.directory.iterdir():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.is_file():
+                files.append((stat.st_mtime, stat.st_size, path))
+        files.sort(key=lambda f: f[0])
+
+        doomed: List[Path] = []
+        expired = evicted = 0
+        keep_size = 0
+        kept = []
+        # stray .part files (writers that died mid-write) only go once they expire
+        for mtime, size, path in files:
+            if now - mtime > self.ttl_s:
+                doomed.append(path)
+                expired += 1
+            else:
+                kept.append((size, path))
+                keep_size += size
+        for size, path in kept:
+            if keep_size <= self.disk_bytes:
+                break
+            if path.name.endswith(".part"):
+                continue
+            doomed.append(path)
+            keep_size -= size
+            evicted += 1
+        for path in doomed:
+            path.unlink(missing_ok=True)
+
+        with self._lock:
+            for path in doomed:
+                self._forget(path.name)
+            for name in [n for n, a in self._memory.items() if now - a.created > self.ttl_s]:
+                self._forget(name)
+            self._counts["expired"] += expired
+            self._counts["evicted"] += evicted
+            self._disk_entries = len(files) - len(doomed)
+            self._disk_size = keep_size
+        return len(doomed)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                **self._counts,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_size,
+                "disk_entries": self._disk_entries,
+                "disk_bytes": self._disk_size,
+            }
+
+
+artifact_store = ArtifactStore()
@@ -0,0 +1,245 @@
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+from faster_whisper.audio import pad_or_trim
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.transcribe import TranscriptionOptions, get_suppressed_tokens
+from faster_whisper.vad import VadOptions, collect_chunks, get_speech_timestamps, merge_segments
+
+from batching import PRIORITY_HIGH, PRIORITY_NORMAL, MicroBatcher
+from executors import run_model
+from utils_audio import SAMPLE_RATE
+
+# streaming window tuning (seconds)
+STREAM_OVERLAP_S = float(os.getenv("STREAM_OVERLAP_S", "1.0"))
+STREAM_MAX_WINDOW_S = float(os.getenv("STREAM_MAX_WINDOW_S", "12.0"))
+
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL", "base")
+
+# cross-session batching
+WHISPER_LANGUAGE = os.getenv("WHISPER_LANGUAGE", "en")
+ASR_BATCH_SIZE = int(os.getenv("ASR_BATCH_SIZE", "8"))
+ASR_BATCH_WINDOW_MS = float(os.getenv("ASR_BATCH_WINDOW_MS", "30"))
+
+# (start, end, text) with times in seconds from the start of the utterance
+TimedWord = Tuple[float, float, str]
+
+
+def _norm_word(word: str) -> str:
+    return re.sub(r"[^\w']+", "", word.lower())
+
+
+def _join(words: List[TimedWord]) -> str:
+    return " ".join(w[2].strip() for w in words if w[2].strip())
+
+
+def words_to_text(words: List[TimedWord]) -> str:
+    return _join(words)
+
+
+class StreamingTranscript:
+    # Keeps a committed transcript prefix for one utterance. Each update only needs
+    # the audio after the commit point (plus a short overlap), so the cost of a
+    # partial stays flat however long the user keeps talking. Words are committed
+    # once two consecutive hypotheses agree on them (local agreement).
+
+    def __init__(self, overlap_s: float = STREAM_OVERLAP_S, max_window_s: float = STREAM_MAX_WINDOW_S):
+        self.overlap_s = overlap_s
+        self.max_window_s = max_window_s
+        self.committed: List[TimedWord] = []
+        self.committed_until = 0.0
+        self.tentative: List[TimedWord] = []
+        self.last_transcribe_at = 0.0
+
+    @property
+    def stable_text(self) -> str:
+        return _join(self.committed)
+
+    @property
+    def tentative_text(self) -> str:
+        return _join(self.tentative)
+
+    @property
+    def text(self) -> str:
+        return " ".join(t for t in (self.stable_text, self.tentative_text) if t)
+
+    def window_start(self, total_samples: int) -> int:
+        # first sample to decode for the next hypothesis
+        start_s = max(0.0, self.committed_until - self.overlap_s)
+        return min(int(start_s * SAMPLE_RATE), total_samples)
+
+    def update(self, words: List[TimedWord], audio_end_s: float, final: bool = False) -> Dict[str, str]:
+        hypothesis = [w for w in words if (w[0] + w[1]) / 2 > self.committed_until and _norm_word(w[2])]
+
+        # timestamps drift between windows, so drop overlap words that repeat the committed tail
+        near_commit = hypothesis and hypothesis[0][0] < self.committed_until + self.overlap_s
+        for n in range(min(5, len(self.committed), len(hypothesis)) if near_commit else 0, 0, -1):
+            tail = [_norm_word(w[2]) for w in self.committed[-n:]]
+            head = [_norm_word(w[2]) for w in hypothesis[:n]]
+            if tail == head:
+                hypothesis = hypothesis[n:]
+                break
+
+        if final:
+            agreed = len(hypothesis)
+        else:
+            agreed = 0
+            for prev, cur in zip(self.tentative, hypothesis):
+                if _norm_word(prev[2]) != _norm_word(cur[2]):
+                    break
+                agreed += 1
+
+        # nothing agreeing for too long: commit everything outside the overlap
+        cutoff = None
+        if not final and not agreed and audio_end_s - self.committed_until > self.max_window_s:
+            cutoff = audio_end_s - self.overlap_s
+            while agreed < len(hypothesis) and hypothesis[agreed][1] <= cutoff:
+                agreed += 1
+
+        newly_committed = hypothesis[:agreed]
+        if newly_committed:
+            self.committed.extend(newly_committed)
+            self.committed_until = newly_committed[-1][1]
+        self.tentative = hypothesis[agreed:]
+        if cutoff is not None:
+            # silence (or no words yet) holds no commit point of its own; move past it
+            # so the window stays bounded instead of growing with every partial
+            until = min(cutoff, self.tentative[0][0]) if self.tentative else cutoff
+            self.committed_until = max(self.committed_until, until)
+
+        return {
+            "delta": _join(newly_committed),
+            "stable": self.stable_text,
+            "tentative": self.tentative_text,
+            "text": self.text,
+        }
+
+
+class AsrScheduler:
+    # Queues transcription requests from every session and runs them through the
+    # one shared WhisperModel as a single batched forward pass. Requests that
+    # arrive within ASR_BATCH_WINDOW_MS of each other share a batch, and final
+    # transcriptions jump ahead of speculative partials.
+
+    def __init__(
+        self,
+        model,
+        language: str = WHISPER_LANGUAGE,
+        max_batch: int = ASR_BATCH_SIZE,
+        window_ms: float = ASR_BATCH_WINDOW_MS,
+    ):
+        self.model = model
+        self.max_batch = max(1, max_batch)
+        self._pipeline = BatchedInferencePipeline(model)
+        self._tokenizer = Tokenizer(
+            model.hf_tokenizer,
+            model.model.is_multilingual,
+            task="transcribe",
+            language=language if model.model.is_multilingual else "en",
+        )
+        chunk_length = model.feature_extractor.chunk_length
+        self._vad = VadOptions(max_speech_duration_s=chunk_length, min_silence_duration_ms=160)
+        # mirrors the defaults BatchedInferencePipeline.transcribe uses
+        self._options = TranscriptionOptions(
+            beam_size=5,
+            best_of=5,
+            patience=1,
+            length_penalty=1,
+            repetition_penalty=1,
+            no_repeat_ngram_size=0,
+            log_prob_threshold=-1.0,
+            no_speech_threshold=0.6,
+            compression_ratio_threshold=2.4,
+            temperatures=[0.0],
+            initial_prompt=None,
+            prefix=None,
+            suppress_blank=True,
+            suppress_tokens=get_suppressed_tokens(self._tokenizer, [-1]),
+            prepend_punctuations="\"'“¿([{-",
+            append_punctuations="\"'.。,，!！?？:：”)]}、",
+            max_new_tokens=None,
+            hotwords=None,
+            word_timestamps=True,
+            hallucination_silence_threshold=None,
+            condition_on_previous_text=False,
+            clip_timestamps=[],
+            prompt_reset_on_temperature=0.5,
+            multilingual=False,
+            without_timestamps=True,
+            max_initial_timestamp=0.0,
+        )
+        self._batcher = MicroBatcher("asr", self._transcribe_batch, self.max_batch, window_ms)
+
+    async def transcribe(self, audio: np.ndarray, final: bool = False) -> List[TimedWord]:
+        priority = PRIORITY_HIGH if final else PRIORITY_NORMAL
+        return await self._batcher.submit(audio, priority=priority)
+
+    def stats(self) -> Dict[str, float]:
+        return self._batcher.stats()
+
+    def warm(self) -> None:
+        # one decode of a second of silence; without VAD the encoder and decoder really
+        # run, so the first user doesn't pay for page-ins and thread-pool start-up.
+        # Blocking: call through run_model.
+        silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+        segments, _info = self.model.transcribe(silence, language=self._tokenizer.language_code, beam_size=1)
+        list(segments)
+
+    def _transcribe_batch(self, audios: List[np.ndarray]) -> List[List[TimedWord]]:
+        # every request is split into VAD speech chunks (<= 30 s); chunks from all
+        # requests are stacked into one feature batch and mapped back afterwards
+        features, metadata, owners = [], [], []
+        for idx, audio in enumerate(audios):
+            if not len(audio):
+                continue
+            clips = merge_segments(get_speech_timestamps(audio, self._vad), self._vad)
+            if not clips:
+                continue
+            chunks, chunks_metadata = collect_chunks(audio, clips)
+            for chunk, chunk_metadata in zip(chunks, chunks_metadata):
+                features.append(pad_or_trim(self.model.feature_extractor(chunk)[..., :-1]))
+                metadata.append(chunk_metadata)
+                owners.append(idx)
+
+        results: List[List[TimedWord]] = [[] for _ in audios]
+        for i in range(0, len(features), self.max_batch):
+            self._pipeline.last_speech_timestamp = 0.0
+            outputs = self._pipeline.forward(
+                np.stack(features[i : i + self.max_batch]),
+                self._tokenizer,
+                metadata[i : i + self.max_batch],
+                self._options,
+            )
+            for owner, segments in zip(owners[i : i + self.max_batch], outputs):
+                for seg in segments:
+                    for w in seg.get("words") or []:
+                        results[owner].append((w["start"], w["end"], w["word"]))
+        return results
+
+
+def _read_window(decoder, stream: StreamingTranscript) -> Tuple[int, np.ndarray]:
+    total = decoder.sample_count()
+    start = stream.window_start(total)
+    return start, decoder.samples(start)
+
+
+async def transcribe_window(
+    scheduler: AsrScheduler, decoder, stream: StreamingTranscript, final: bool = False
+) -> Optional[Dict[str, str]]:
+    # decoder holds the utterance so far (utils_audio.StreamDecoder); only the
+    # uncommitted tail is pulled out and transcribed
+    start, window = await run_model(_read_window, decoder, stream)
+    if not len(window):
+        return None
+
+    offset_s = start / SAMPLE_RATE
+    words = [(offset_s + w[0], offset_s + w[1], w[2]) for w in await scheduler.transcribe(window, final=final)]
+    return stream.update(words, audio_end_s=(start + len(window)) / SAMPLE_RATE, final=final)
+
+
+def create_asr_scheduler() -> AsrScheduler:
+    # blocking: loads the Whisper weights
+    return AsrScheduler(WhisperModel(WHISPER_MODEL_SIZE, device="auto", compute_type="int8"))
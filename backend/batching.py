@@ -0,0 +1,95 @@
+import asyncio
+import itertools
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from executors import run_model
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+
+
+class MicroBatcher:
+    # Collects requests from every session for a short window and hands them to
+    # process_batch (a blocking fn: list of items -> list of results, same order)
+    # on the model executor. Lower priority values are served first.
+
+    def __init__(
+        self,
+        name: str,
+        process_batch: Callable[[List[Any]], List[Any]],
+        max_batch: int = 8,
+        window_ms: float = 30.0,
+        executor: Callable[..., Awaitable[Any]] = run_model,
+    ):
+        self.name = name
+        self.max_batch = max(1, max_batch)
+        self.window_s = max(0.0, window_ms) / 1000.0
+        self._process_batch = process_batch
+        self._executor = executor
+        self._seq = itertools.count()
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.items = 0
+        self.max_seen_batch = 0
+        self.queue_wait_s = 0.0
+        self.model_time_s = 0.0
+
+    def _ensure_worker(self) -> asyncio.PriorityQueue:
+        if self._queue is None or self._worker is None or self._worker.done():
+            self._queue = self._queue or asyncio.PriorityQueue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        return self._queue
+
+    async def submit(self, item: Any, priority: int = PRIORITY_NORMAL) -> Any:
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((priority, next(self._seq), time.perf_counter(), item, future))
+        return await future
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            if queue.qsize() < self.max_batch - 1 and self.window_s:
+                await asyncio.sleep(self.window_s)
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            # callers that gave up (cancelled) don't cost a slot in the forward pass
+            batch = [entry for entry in batch if not entry[4].done()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            self.batches += 1
+            self.items += len(batch)
+            self.max_seen_batch = max(self.max_seen_batch, len(batch))
+            self.queue_wait_s += sum(started - entry[2] for entry in batch)
+
+            items = [entry[3] for entry in batch]
+            try:
+                results = await self._executor(self._process_batch, items)
+            except Exception as exc:
+                for entry in batch:
+                    if not entry[4].done():
+                        entry[4].set_exception(exc)
+                continue
+            finally:
+                self.model_time_s += time.perf_counter() - started
+
+            for entry, result in zip(batch, results):
+                if not entry[4].done():
+                    entry[4].set_result(result)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_seen_batch,
+            "avg_queue_wait_ms": 1000 * self.queue_wait_s / self.items if self.items else 0.0,
+            "avg_model_time_ms": 1000 * self.model_time_s / self.batches if self.batches else 0.0,
+        }
@@ -0,0 +1,170 @@
+"""Parity and latency of the ONNX int8 classifier backend against the PyTorch pipelines.
+
+Run from backend/:  python -m benchmarks.classifier_parity [--only emotion] [--out parity.json] [--markdown]
+
+Needs torch and optimum[onnxruntime]; the ONNX models are exported to ONNX_CACHE_DIR on
+the first run. Every model sees the same fixed texts through both backends. Labels must
+agree on at least --min-agreement of them (int8 can flip a near tie), top scores may
+drift by at most --max-score-delta, and embeddings must keep --min-cosine similarity.
+Exits 1 when a model misses any of these. --markdown prints the results as the table
+kept in the README next to CLASSIFIER_BACKEND; latencies are machine specific.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+from transformers import pipeline
+
+from benchmarks.fixtures import TEXTS
+from benchmarks.intent_engines import UTTERANCES
+from emotion import EMOTION_MODEL
+from intent import INTENT_EMBED_MODEL, INTENT_ZSC_MODEL, LABELS
+from onnx_backend import onnx_pipeline
+
+PARITY_TEXTS: List[str] = list(dict.fromkeys(TEXTS + [text for text, _ in UTTERANCES]))
+
+# name -> (task, model id, pipeline kwargs, call)
+CASES: Dict[str, Tuple[str, str, Dict[str, Any], Callable[[Any, str], Any]]] = {
+    "emotion": (
+        "text-classification",
+        EMOTION_MODEL,
+        {"top_k": 1},
+        lambda pipe, text: pipe(text, truncation=True),
+    ),
+    "intent_zsc": (
+        "zero-shot-classification",
+        INTENT_ZSC_MODEL,
+        {},
+        lambda pipe, text: pipe(text, candidate_labels=LABELS, multi_label=False),
+    ),
+    "intent_embedding": (
+        "feature-extraction",
+        INTENT_EMBED_MODEL,
+        {},
+        lambda pipe, text: pipe(text, truncation=True),
+    ),
+}
+
+
+def _label_score(result: Any) -> Tuple[str, float]:
+    if isinstance(result, dict) and "labels" in result:
+        return result["labels"][0], float(result["scores"][0])
+    while isinstance(result, list):
+        result = result[0]
+    return result["label"], float(result["score"])
+
+
+def _vector(result: Any) -> np.ndarray:
+    tokens = np.asarray(result, dtype=np.float32)
+    if tokens.ndim == 3:
+        tokens = tokens[0]
+    vector = tokens.mean(axis=0)
+    return vector / max(float(np.linalg.norm(vector)), 1e-9)
+
+
+def _run(pipe: Any, call: Callable[[Any, str], Any]) -> Tuple[List[Any], float]:
+    call(pipe, PARITY_TEXTS[0])  # first-inference cost stays out of the numbers
+    outputs, latencies = [], []
+    for text in PARITY_TEXTS:
+        start = time.perf_counter()
+        outputs.append(call(pipe, text))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return outputs, statistics.median(latencies)
+
+
+def compare(name: str, args: argparse.Namespace) -> Dict[str, Any]:
+    task, model_name, kwargs, call = CASES[name]
+    reference, torch_ms = _run(pipeline(task, model=model_name, **kwargs), call)
+    candidate, onnx_ms = _run(onnx_pipeline(task, model_name, **kwargs), call)
+    result: Dict[str, Any] = {"model": model_name, "torch_p50_ms": torch_ms, "onnx_p50_ms": onnx_ms}
+
+    if task == "feature-extraction":
+        cosines = [float(_vector(a) @ _vector(b)) for a, b in zip(reference, candidate)]
+        result["min_cosine"] = min(cosines)
+        result["ok"] = result["min_cosine"] >= args.min_cosine
+        return result
+
+    pairs = [(_label_score(a), _label_score(b)) for a, b in zip(reference, candidate)]
+    result["agreement"] = sum(1 for a, b in pairs if a[0] == b[0]) / len(pairs)
+    result["max_score_delta"] = max(abs(a[1] - b[1]) for a, b in pairs)
+    result["mismatches"] = [
+        {"text": text, "torch": a[0], "onnx": b[0]} for text, (a, b) in zip(PARITY_TEXTS, pairs) if a[0] != b[0]
+    ]
+    result["ok"] = result["agreement"] >= args.min_agreement and result["max_score_delta"] <= args.max_score_delta
+    return result
+
+
+def _metadata() -> Dict[str, Any]:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "texts": len(PARITY_TEXTS),
+    }
+
+
+def _markdown(results: Dict[str, Dict[str, Any]], meta: Dict[str, Any]) -> str:
+    lines = [
+        f"Measured {meta['timestamp'][:10]} on {meta['machine']}, {meta['cpu_count']} CPUs, {meta['texts']} texts:",
+        "",
+        "| model | parity | torch p50 | onnx int8 p50 | speedup |",
+        "|---|---|---|---|---|",
+    ]
+    for r in results.values():
+        parity = (
+            f"min cosine {r['min_cosine']:.4f}"
+            if "min_cosine" in r
+            else f"{r['agreement']:.0%} labels agree, max score delta {r['max_score_delta']:.3f}"
+        )
+        speedup = r["torch_p50_ms"] / r["onnx_p50_ms"] if r["onnx_p50_ms"] else 0.0
+        lines.append(
+            f"| `{r['model']}` | {parity} | {r['torch_p50_ms']:.1f} ms | {r['onnx_p50_ms']:.1f} ms | {speedup:.1f}x |"
+        )
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", default="", help=f"comma-separated subset of {', '.join(CASES)}")
+    parser.add_argument("--min-agreement", type=float, default=0.95)
+    parser.add_argument("--max-score-delta", type=float, default=0.1)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--out", default="")
+    parser.add_argument("--markdown", action="store_true", help="also print a README table")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.only.split(",") if n.strip()] or list(CASES)
+    results = {name: compare(name, args) for name in names}
+    for name, r in results.items():
+        parity = (
+            f"min_cosine={r['min_cosine']:.4f}"
+            if "min_cosine" in r
+            else f"agreement={r['agreement']:.2f} max_score_delta={r['max_score_delta']:.3f}"
+        )
+        speedup = r["torch_p50_ms"] / r["onnx_p50_ms"] if r["onnx_p50_ms"] else 0.0
+        print(
+            f"{name:17s} {'ok  ' if r['ok'] else 'FAIL'} {parity} "
+            f"torch={r['torch_p50_ms']:.1f}ms onnx={r['onnx_p50_ms']:.1f}ms ({speedup:.1f}x)"
+        )
+        for miss in r.get("mismatches", []):
+            print(f"    {miss['torch']} -> {miss['onnx']}: {miss['text']}")
+    meta = _metadata()
+    if args.markdown:
+        print()
+        print(_markdown(results, meta))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+    return 0 if all(r["ok"] for r in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+"""Per-component latency benchmarks with regression tracking against a stored baseline.
+
+Run from backend/:
+  python -m benchmarks.components                   # run all, write benchmarks/latest.json
+  python -m benchmarks.components --save-baseline   # ...and store it as benchmarks/baseline.json
+  python -m benchmarks.components --only risk,render,choose_mode
+
+Each component's p50 is compared with the baseline and the run exits with status 1
+if any is more than --tolerance slower. Baselines are machine specific, so none is
+committed: record one with --save-baseline on the machine that runs the comparison.
+Without one the run exits with status 2 rather than passing without comparing.
+
+Everything runs offline. Groq and ElevenLabs are pointed at an unroutable address and
+the LLM plan is stubbed; Hugging Face and Whisper weights are only loaded from the
+local cache, and components whose weights are missing are reported as skipped.
+"""
+import os
+
+os.environ.update(
+    {
+        "GROQ_API_KEY": "offline",
+        "GROQ_BASE_URL": "http://127.0.0.1:9/v1",
+        "ELEVENLABS_API_KEY": "offline",
+        "ELEVENLABS_BASE_URL": "http://127.0.0.1:9",
+        "HF_HUB_OFFLINE": "1",
+        "TRANSFORMERS_OFFLINE": "1",
+    }
+)
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from itertools import cycle
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.fixtures import CLIP_SECONDS, PLANS, TEXTS, clip_samples, clip_webm
+
+HERE = Path(__file__).parent
+DEFAULT_OUT = HERE / "latest.json"
+DEFAULT_BASELINE = HERE / "baseline.json"
+
+# each factory does its (untimed) setup and returns the call to time
+Factory = Callable[[argparse.Namespace], Callable[[], Any]]
+BENCHMARKS: List[Tuple[str, Factory, int]] = []
+
+
+def benchmark(name: str, repeats: int = 200):
+    def register(factory: Factory) -> Factory:
+        BENCHMARKS.append((name, factory, repeats))
+        return factory
+
+    return register
+
+
+def _summarize(latencies: List[float]) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    return {
+        "runs": len(latencies),
+        "p50_ms": round(statistics.median(latencies), 4),
+        "p95_ms": round(latencies[max(0, math.ceil(0.95 * len(latencies)) - 1)], 4),
+        "mean_ms": round(statistics.fmean(latencies), 4),
+        "min_ms": round(latencies[0], 4),
+    }
+
+
+def _measure(call: Callable[[], Any], repeats: int, warmup: int = 2) -> Dict[str, float]:
+    for _ in range(warmup):
+        call()
+    latencies: List[float] = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return _summarize(latencies)
+
+
+for _seconds in CLIP_SECONDS:
+
+    @benchmark(f"to_wav_16k_mono/{_seconds}s", repeats=10)
+    def _to_wav(args: argparse.Namespace, seconds: float = _seconds) -> Callable[[], Any]:
+        from utils_audio import to_wav_16k_mono
+
+        if shutil.which("ffmpeg") is None:
+            raise RuntimeError("ffmpeg not on PATH")
+        tmp = Path(tempfile.mkdtemp(prefix="aura-bench-"))
+        src = tmp / "in.webm"
+        src.write_bytes(clip_webm(seconds))
+        return lambda: to_wav_16k_mono(src, tmp / "out.wav")
+
+    @benchmark(f"decode_audio_bytes/{_seconds}s", repeats=20)
+    def _decode(args: argparse.Namespace, seconds: float = _seconds) -> Callable[[], Any]:
+        from utils_audio import decode_audio_bytes
+
+        data = clip_webm(seconds)
+        return lambda: decode_audio_bytes(data)
+
+    @benchmark(f"whisper.transcribe/{_seconds}s", repeats=3)
+    def _whisper(args: argparse.Namespace, seconds: float = _seconds) -> Callable[[], Any]:
+        model = _whisper_model(args.whisper_model)
+        audio = clip_samples(seconds)
+
+        def call() -> None:
+            segments, _info = model.transcribe(audio, language="en", beam_size=1)
+            list(segments)
+
+        return call
+
+
+_whisper_models: Dict[str, Any] = {}
+
+
+def _whisper_model(size: str):
+    if size not in _whisper_models:
+        from faster_whisper import WhisperModel
+
+        _whisper_models[size] = WhisperModel(size, device="cpu", compute_type="int8", local_files_only=True)
+    return _whisper_models[size]
+
+
+@benchmark("classify_intent", repeats=50)
+def _intent(args: argparse.Namespace) -> Callable[[], Any]:
+    from intent import classify_intent
+
+    texts = cycle(TEXTS)
+    classify_intent(TEXTS[0])
+    return lambda: classify_intent(next(texts))
+
+
+@benchmark("detect_emotion_with_score", repeats=50)
+def _emotion(args: argparse.Namespace) -> Callable[[], Any]:
+    from emotion import detect_emotion_with_score
+
+    texts = cycle(TEXTS)
+    detect_emotion_with_score(TEXTS[0])
+    return lambda: detect_emotion_with_score(next(texts))
+
+
+@benchmark("risk_level_from_text", repeats=2000)
+def _risk(args: argparse.Namespace) -> Callable[[], Any]:
+    from safety import risk_level_from_text
+
+    texts = cycle(TEXTS)
+    return lambda: risk_level_from_text(next(texts))
+
+
+@benchmark("render_from_plan", repeats=2000)
+def _render(args: argparse.Namespace) -> Callable[[], Any]:
+    from renderer import render_from_plan
+
+    plans = cycle(PLANS)
+
+    def call() -> None:
+        plan = next(plans)
+        render_from_plan(plan, plan["mode"], "stress", "sadness", [])
+
+    return call
+
+
+@benchmark("choose_mode", repeats=2000)
+def _choose_mode(args: argparse.Namespace) -> Callable[[], Any]:
+    from mode import allowed_modes, choose_mode
+
+    turns = cycle(range(64))
+    allowed = allowed_modes("goal_setting", "sadness")
+    return lambda: choose_mode(allowed, ["reflection", "values"], seed=f"bench:{next(turns)}")
+
+
+@benchmark("turn_pipeline (stubbed LLM)", repeats=20)
+def _turn(args: argparse.Namespace) -> Callable[[], Any]:
+    # classifiers, mode, opener and render for real; the Groq plan is a canned answer
+    import turn
+
+    plans = cycle(PLANS)
+
+    async def plan_stub(*_args: Any) -> Dict[str, str]:
+        return dict(next(plans))
+
+    turn.plan_response_json = plan_stub
+    loop = asyncio.new_event_loop()
+    texts = cycle(TEXTS)
+    counter = cycle(range(1000))
+
+    def call() -> None:
+        ctx = {
+            "session_id": "bench",
+            "text": next(texts),
+            "history": [],
+            "last_modes": [],
+            "last_openers": [],
+            "turn_index": next(counter),
+            "disallowed_openers": [],
+        }
+        loop.run_until_complete(turn.turn_pipeline.run(ctx, ["render"]))
+
+    try:
+        call()
+    except Exception:
+        # stop the batchers and stages the failed run left behind before skipping
+        pending = asyncio.all_tasks(loop)
+        for task in pending:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        loop.close()
+        raise
+    return call
+
+
+def run(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    wanted = [w.strip() for w in args.only.split(",") if w.strip()] if args.only else []
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, factory, repeats in BENCHMARKS:
+        if wanted and not any(w in name for w in wanted):
+            continue
+        try:
+            call = factory(args)
+        except Exception as exc:
+            results[name] = {"skipped": f"{type(exc).__name__}: {exc}"[:200]}
+            print(f"{name:34s} skipped ({results[name]['skipped']})")
+            continue
+        results[name] = _measure(call, max(1, int(repeats * args.scale)))
+        r = results[name]
+        print(f"{name:34s} p50={r['p50_ms']:.3f}ms p95={r['p95_ms']:.3f}ms runs={r['runs']}")
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float, min_delta_ms: float
+) -> List[str]:
+    regressions: List[str] = []
+    print(f"\n{'component':34s} {'baseline':>10s} {'current':>10s} {'change':>8s}")
+    for name, current in results.items():
+        base = baseline.get(name, {})
+        if "p50_ms" in base and "p50_ms" not in current:
+            print(f"{name:34s} {base['p50_ms']:9.3f}ms {'skipped':>10s}")
+            continue
+        if "p50_ms" not in current or "p50_ms" not in base:
+            continue
+        old, new = base["p50_ms"], current["p50_ms"]
+        change = (new - old) / old if old else 0.0
+        regressed = change > tolerance and new - old > min_delta_ms
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:34s} {old:9.3f}ms {new:9.3f}ms {change:+7.1%}{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def _metadata(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "whisper_model": args.whisper_model,
+    }
+
+
+def main() -> Optional[int]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", default="", help="comma-separated substrings of component names")
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown, as a fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="ignore slowdowns smaller than this")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier on every component's repeat count")
+    parser.add_argument("--whisper-model", default=os.getenv("WHISPER_MODEL", "base"))
+    args = parser.parse_args()
+
+    report = {"meta": _metadata(args), "results": run(args)}
+    args.out.write_text(json.dumps(report, indent=2))
+    print(f"\nwrote {args.out}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"saved baseline {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"\nno baseline at {args.baseline}: nothing was compared", file=sys.stderr)
+        print("record one on this machine with --save-baseline", file=sys.stderr)
+        return 2
+
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare(report["results"], baseline.get("results", {}), args.tolerance, args.min_delta_ms)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Deterministic fixture audio and text for the benchmarks.
+
+Clips are synthesized from a fixed seed (voiced harmonics with a syllable-rate
+envelope plus a little noise) and encoded to WebM/Opus in memory, so every run
+decodes and transcribes the same audio without shipping binary files (only the
+container's random segment UID differs between runs).
+"""
+import io
+from functools import lru_cache
+from typing import Dict, List
+
+import av
+import numpy as np
+
+SAMPLE_RATE = 16000
+CLIP_SECONDS = (2, 5, 10, 20)
+
+TEXTS: List[str] = [
+    "I just need to vent about how annoying my day was.",
+    "I have three deadlines tomorrow and I'm freaking out.",
+    "My girlfriend and I had a huge fight last night and I don't know what to do.",
+    "I want to start running three times a week but I keep skipping it.",
+    "It's been a year since we lost our dog and it still hurts.",
+    "Honestly I'm fine, I just wanted to talk for a minute about nothing in particular.",
+    "I feel hopeless about work and I can't go on like this much longer.",
+    "Can you help me make a plan to study more before my exams?",
+]
+
+PLANS: List[Dict[str, str]] = [
+    {
+        "mode": "reflection",
+        "reflection": "It sounds like today wore you down more than you expected.",
+        "core": "Naming that can take a little of the weight off. You don't have to fix it all tonight.",
+        "question": "What part of the day is still sitting with you most?",
+        "tagline": "",
+    },
+    {
+        "mode": "options",
+        "reflection": "Three deadlines at once is a lot to hold.",
+        "core": "Start with the smallest one | Ask for one extension | Block two focused hours",
+        "question": "Which of those feels most doable right now?",
+        "tagline": "One step at a time.",
+    },
+    {
+        "mode": "micro_plan",
+        "reflection": "You want running to stick this time.",
+        "core": "Pick three fixed slots. Lay out your shoes the night before. Keep the first runs short.",
+        "question": "When could the first one happen this week?",
+        "tagline": "",
+    },
+]
+
+
+@lru_cache(maxsize=None)
+def clip_samples(seconds: float, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    f0 = 140 + 25 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    # ~4 syllables a second with a pause every couple of seconds
+    envelope = np.clip(np.sin(2 * np.pi * 2.0 * t), 0, None) * (np.sin(2 * np.pi * 0.4 * t) > -0.6)
+    audio = 0.25 * voiced * envelope + 0.01 * rng.standard_normal(t.shape)
+    return audio.astype(np.float32)
+
+
+@lru_cache(maxsize=None)
+def clip_webm(seconds: float) -> bytes:
+    # what a browser MediaRecorder would upload
+    samples = clip_samples(seconds)
+    buf = io.BytesIO()
+    with av.open(buf, "w", format="webm") as container:
+        stream = container.add_stream("libopus", rate=48000, layout="mono")
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=48000)
+        pcm = (np.clip(samples, -1, 1) * 32767).astype(np.int16)[None, :]
+        frame = av.AudioFrame.from_ndarray(pcm, format="s16", layout="mono")
+        frame.sample_rate = SAMPLE_RATE
+        for resampled in resampler.resample(frame) + resampler.resample(None):
+            for packet in stream.encode(resampled):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return buf.getvalue()
@@ -0,0 +1,127 @@
+"""Accuracy/latency comparison of the intent engines on a fixed utterance set.
+
+Run from backend/:  python -m benchmarks.intent_engines [--out results.json] [--markdown]
+
+--markdown prints the results as the table kept in the README next to INTENT_ENGINE;
+run it on the hardware that serves the models, since the latencies are machine specific.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import intent
+
+UTTERANCES: List[Tuple[str, str]] = [
+    ("I just need to vent about how annoying my day was.", "venting"),
+    ("Honestly I just want to rant, nobody listens to me.", "venting"),
+    ("Ugh, I'm so fed up with everything right now.", "venting"),
+    ("I have three deadlines tomorrow and I'm freaking out.", "stress"),
+    ("Work has been so stressful this week.", "stress"),
+    ("There's too much on my plate and I can't keep up.", "stress"),
+    ("I can't stop worrying that something bad will happen.", "anxiety"),
+    ("My heart races every time I think about the interview.", "anxiety"),
+    ("I feel nervous about everything lately.", "anxiety"),
+    ("My girlfriend and I had a huge fight last night.", "relationship"),
+    ("I don't know how to talk to my dad anymore.", "relationship"),
+    ("My best friend stopped replying to my messages.", "relationship"),
+    ("I want to start running three times a week.", "goal_setting"),
+    ("Can you help me make a plan to study more?", "goal_setting"),
+    ("I'm trying to build a morning routine.", "goal_setting"),
+    ("I'm so burnt out, I can't do this job anymore.", "burnout"),
+    ("I'm exhausted all the time and nothing feels worth it at work.", "burnout"),
+    ("I've been running on empty for months.", "burnout"),
+    ("My grandmother passed away last month.", "grief"),
+    ("I keep thinking about my mom since she died.", "grief"),
+    ("It's been a year since we lost our dog and it still hurts.", "grief"),
+    ("What time is it?", "other"),
+    ("Can you tell me a fun fact?", "other"),
+    ("Hi, I'm just testing this out.", "other"),
+]
+
+
+def _run(engine: Callable[[List[str]], List[str]], repeats: int) -> Dict[str, float]:
+    texts = [t for t, _ in UTTERANCES]
+    expected = [label for _, label in UTTERANCES]
+
+    engine(texts[:1])  # load + first-inference cost stays out of the numbers
+
+    latencies: List[float] = []
+    predicted: List[str] = []
+    for _ in range(repeats):
+        predicted = []
+        for text in texts:
+            start = time.perf_counter()
+            predicted.extend(engine([text]))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    correct = sum(1 for p, e in zip(predicted, expected) if p == e)
+    latencies.sort()
+    return {
+        "accuracy": correct / len(expected),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[max(0, math.ceil(0.95 * len(latencies)) - 1)],
+        "mean_ms": statistics.fmean(latencies),
+    }
+
+
+def _metadata() -> Dict[str, Any]:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "zsc_model": intent.INTENT_ZSC_MODEL,
+        "embedding_model": intent.INTENT_EMBED_MODEL,
+    }
+
+
+def _markdown(results: Dict[str, Dict[str, float]], meta: Dict[str, Any]) -> str:
+    lines = [
+        f"Measured {meta['timestamp'][:10]} on {meta['machine']}, {meta['cpu_count']} CPUs, "
+        f"{len(UTTERANCES)} utterances:",
+        "",
+        "| INTENT_ENGINE | model | accuracy | p50 | p95 | mean |",
+        "|---|---|---|---|---|---|",
+    ]
+    for name, r in results.items():
+        model = meta["zsc_model"] if name == "zsc" else meta["embedding_model"]
+        lines.append(
+            f"| `{name}` | `{model}` | {r['accuracy']:.2f} | {r['p50_ms']:.1f} ms "
+            f"| {r['p95_ms']:.1f} ms | {r['mean_ms']:.1f} ms |"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--out", default="")
+    parser.add_argument("--markdown", action="store_true", help="also print a README table")
+    args = parser.parse_args()
+
+    results = {
+        "zsc": _run(intent.classify_intent_zsc, args.repeats),
+        "embedding": _run(intent.classify_intent_embedding, args.repeats),
+    }
+    for name, r in results.items():
+        print(
+            f"{name:10s} accuracy={r['accuracy']:.2f} p50={r['p50_ms']:.1f}ms "
+            f"p95={r['p95_ms']:.1f}ms mean={r['mean_ms']:.1f}ms"
+        )
+    meta = _metadata()
+    if args.markdown:
+        print()
+        print(_markdown(results, meta))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+from typing import Dict, Tuple
+
+from batching import MicroBatcher
+from emotion import EMOTION_MODEL, detect_emotion_batch
+from intent import INTENT_MODEL, classify_intent_with_score_batch
+from model_ipc import model_client
+from result_cache import classifier_cache
+
+CLASSIFIER_BATCH_SIZE = int(os.getenv("CLASSIFIER_BATCH_SIZE", "16"))
+CLASSIFIER_BATCH_WINDOW_MS = float(os.getenv("CLASSIFIER_BATCH_WINDOW_MS", "15"))
+
+# concurrent turns from different sessions share one padded forward pass per model
+_intent_batcher = MicroBatcher("intent", classify_intent_with_score_batch, CLASSIFIER_BATCH_SIZE, CLASSIFIER_BATCH_WINDOW_MS)
+_emotion_batcher = MicroBatcher("emotion", detect_emotion_batch, CLASSIFIER_BATCH_SIZE, CLASSIFIER_BATCH_WINDOW_MS)
+
+
+async def _cached(batcher: MicroBatcher, model: str, text: str) -> Tuple[str, float]:
+    # repeated short utterances skip the batcher; with a model server this runs there,
+    # so every web worker shares one cache
+    result = classifier_cache.get(model, text)
+    if result is None:
+        result = await batcher.submit(text)
+        classifier_cache.put(model, text, result)
+    return result
+
+
+async def classify_intent_local(text: str) -> Tuple[str, float]:
+    return await _cached(_intent_batcher, INTENT_MODEL, text)
+
+
+async def detect_emotion_local(text: str) -> Tuple[str, float]:
+    return await _cached(_emotion_batcher, EMOTION_MODEL, text)
+
+
+async def classify_intent_with_score_async(text: str) -> Tuple[str, float]:
+    if not (text or "").strip():
+        return "other", 0.0
+    if model_client is not None:
+        return await model_client.classify_intent_with_score(text)
+    return await classify_intent_local(text)
+
+
+async def classify_intent_async(text: str) -> str:
+    label, _score = await classify_intent_with_score_async(text)
+    return label
+
+
+async def detect_emotion_with_score_async(text: str) -> Tuple[str, float]:
+    if not (text or "").strip():
+        return "neutral", 0.0
+    if model_client is not None:
+        return await model_client.detect_emotion_with_score(text)
+    return await detect_emotion_local(text)
+
+
+async def detect_emotion_async(text: str) -> str:
+    label, _score = await detect_emotion_with_score_async(text)
+    return label
+
+
+def classifier_stats() -> Dict[str, Dict[str, float]]:
+    return {"intent": _intent_batcher.stats(), "emotion": _emotion_batcher.stats()}
+
+
+def classifier_cache_stats() -> Dict[str, object]:
+    return classifier_cache.stats()
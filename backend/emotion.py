@@ -1,7 +1,7 @@
 import os
-from typing import Tuple
+from typing import List, Tuple
 
-from transformers import pipeline
+from onnx_backend import classifier_pipeline
 
 DEFAULT_MODEL = "bhadresh-savani/distilbert-base-uncased-emotion"
 EMOTION_MODEL = os.getenv("EMOTION_MODEL", DEFAULT_MODEL)
@@ -22,7 +22,7 @@ _LABEL_MAP = {
 def _get_pipe():
     global _emotion_pipe
     if _emotion_pipe is None:
-        _emotion_pipe = pipeline("text-classification", model=EMOTION_MODEL, top_k=1)
+        _emotion_pipe = classifier_pipeline("text-classification", EMOTION_MODEL, top_k=1)
     return _emotion_pipe
 
 
@@ -32,13 +32,7 @@ def _normalize(label: str) -> str:
     return _LABEL_MAP.get(label.lower(), "neutral")
 
 
-def detect_emotion_with_score(text: str) -> Tuple[str, float]:
-    if not text.strip():
-        return "neutral", 0.0
-
-    pipe = _get_pipe()
-    result = pipe(text, truncation=True)
-
+def _best(result) -> Tuple[str, float]:
     best = None
     if isinstance(result, dict):
         best = result
@@ -57,6 +51,36 @@ def detect_emotion_with_score(text: str) -> Tuple[str, float]:
     return label, score
 
 
+def detect_emotion_with_score(text: str) -> Tuple[str, float]:
+    if not text.strip():
+        return "neutral", 0.0
+
+    pipe = _get_pipe()
+    return _best(pipe(text, truncation=True))
+
+
+def detect_emotion_batch(texts: List[str]) -> List[Tuple[str, float]]:
+    # single padded forward pass over every non-empty text
+    out: List[Tuple[str, float]] = [("neutral", 0.0)] * len(texts)
+    todo = [i for i, t in enumerate(texts) if (t or "").strip()]
+    if not todo:
+        return out
+
+    pipe = _get_pipe()
+    results = pipe([texts[i] for i in todo], truncation=True, batch_size=len(todo))
+    for i, result in zip(todo, results):
+        out[i] = _best([result] if isinstance(result, list) else result)
+    return out
+
+
+def load_emotion_model() -> None:
+    _get_pipe()
+
+
+def warm_emotion() -> None:
+    detect_emotion_batch(["I just need to talk for a minute."])
+
+
 def detect_emotion(text: str) -> str:
     label, _score = detect_emotion_with_score(text)
     return label
@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+from faster_whisper.vad import get_vad_model
+
+# end the turn on the server after trailing silence instead of waiting for the
+# client's end_of_speech; clients can also opt in per stream with "server_endpointing"
+VAD_ENDPOINTING = os.getenv("VAD_ENDPOINTING", "0") == "1"
+ENDPOINT_SILENCE_MS = float(os.getenv("ENDPOINT_SILENCE_MS", "600"))
+# ignore coughs and clicks: this much speech has to come first
+ENDPOINT_MIN_SPEECH_MS = float(os.getenv("ENDPOINT_MIN_SPEECH_MS", "250"))
+ENDPOINT_SPEECH_THRESHOLD = float(os.getenv("ENDPOINT_SPEECH_THRESHOLD", "0.5"))
+
+# Silero works on 512-sample frames (32 ms at 16 kHz)
+_FRAME = 512
+# the model starts from a blank state on every call, so each update re-runs a little
+# audio before the new frames to let it settle
+_CONTEXT_FRAMES = 16
+
+
+class Endpointer:
+    # Runs the Silero VAD bundled with faster-whisper over each newly decoded stretch
+    # of a stream and tracks how much speech has been heard and how long the current
+    # silence is. update() reports True once speech has been followed by silence_ms of
+    # non-speech. Blocking: call through run_model.
+
+    def __init__(
+        self,
+        silence_ms: float = ENDPOINT_SILENCE_MS,
+        min_speech_ms: float = ENDPOINT_MIN_SPEECH_MS,
+        threshold: float = ENDPOINT_SPEECH_THRESHOLD,
+        sample_rate: int = 16000,
+    ):
+        self.silence_ms = silence_ms
+        self.min_speech_ms = min_speech_ms
+        self.threshold = threshold
+        # a frame only counts as silence well below the speech threshold (hysteresis)
+        self.silence_threshold = max(0.0, threshold - 0.15)
+        self.frame_ms = _FRAME * 1000 / sample_rate
+        self.speech_heard_ms = 0.0
+        self.trailing_silence_ms = 0.0
+        self._pos = 0
+
+    def update(self, decoder) -> bool:
+        total = decoder.sample_count()
+        frames = (total - self._pos) // _FRAME
+        if frames <= 0:
+            return self.endpointed
+        start = max(0, self._pos - _CONTEXT_FRAMES * _FRAME)
+        end = self._pos + frames * _FRAME
+        # a private copy: samples() may be a read-only frombuffer view or the decoder's
+        # cached buffer, and the Silero wrapper writes into its input
+        audio = np.array(decoder.samples(start)[: end - start], dtype=np.float32, copy=True)
+        probs = get_vad_model()(audio[None, :])[0][-frames:]
+        self._pos = end
+
+        for prob in probs:
+            if prob >= self.threshold:
+                self.speech_heard_ms += self.frame_ms
+                self.trailing_silence_ms = 0.0
+            elif prob < self.silence_threshold:
+                self.trailing_silence_ms += self.frame_ms
+        return self.endpointed
+
+    @property
+    def endpointed(self) -> bool:
+        return self.speech_heard_ms >= self.min_speech_ms and self.trailing_silence_ms >= self.silence_ms
+
+
+def warm_vad() -> None:
+    # loads the ONNX sessions before the first stream needs them
+    get_vad_model()(np.zeros((1, _FRAME), dtype=np.float32))
@@ -0,0 +1,81 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+# blocking I/O: ffmpeg pipes, file writes (Groq and ElevenLabs calls are async)
+IO_POOL_SIZE = int(os.getenv("IO_POOL_SIZE", "32"))
+# CPU-bound model inference. CTranslate2 and torch release the GIL while they
+# run, so a small dedicated thread pool keeps one copy of each model in memory
+# while capping how many inferences compete for cores at once.
+MODEL_POOL_SIZE = int(os.getenv("MODEL_POOL_SIZE", str(max(1, (os.cpu_count() or 2) // 2))))
+
+
+class _Pool:
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = max(1, size)
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix=f"aura-{name}")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+
+    def _wrap(self, fn: Callable[..., T]) -> Callable[..., T]:
+        def run(*args: Any, **kwargs: Any) -> T:
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.running -= 1
+
+        return run
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.queued += 1
+        future = self._executor.submit(functools.partial(self._wrap(fn), *args, **kwargs))
+        future.add_done_callback(self._unqueue_cancelled)
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def _unqueue_cancelled(self, future: Future) -> None:
+        # a job cancelled while still queued (its caller was cancelled, or shutdown)
+        # never runs, so never takes itself off the queue count
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": self.size, "queued": self.queued, "running": self.running}
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_io_pool = _Pool("io", IO_POOL_SIZE)
+_model_pool = _Pool("model", MODEL_POOL_SIZE)
+
+
+async def run_io(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    return await _io_pool.run(fn, *args, **kwargs)
+
+
+async def run_model(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    return await _model_pool.run(fn, *args, **kwargs)
+
+
+def executor_stats() -> Dict[str, Dict[str, int]]:
+    return {"io": _io_pool.stats(), "model": _model_pool.stats()}
+
+
+def shutdown_executors() -> None:
+    _io_pool.shutdown()
+    _model_pool.shutdown()
@@ -0,0 +1,35 @@
+# Local stand-in for the ElevenLabs TTS endpoint, for exercising streaming speech
+# without network access or credits:
+#   uvicorn fake_tts:app --port 8011
+#   ELEVENLABS_BASE_URL=http://127.0.0.1:8011 ELEVENLABS_API_KEY=fake uvicorn app:app
+import asyncio
+import hashlib
+import os
+
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+
+FAKE_TTS_DELAY_MS = float(os.getenv("FAKE_TTS_DELAY_MS", "150"))
+# per character of input, roughly how synthesis time scales
+FAKE_TTS_MS_PER_CHAR = float(os.getenv("FAKE_TTS_MS_PER_CHAR", "2"))
+
+app = FastAPI(title="Fake ElevenLabs TTS")
+
+
+def fake_mp3(text: str) -> bytes:
+    # deterministic bytes per text: an ID3 header plus a digest-derived body
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return b"ID3\x04\x00\x00\x00\x00\x00\x00" + digest * max(1, len(text) // 8)
+
+
+@app.post("/v1/text-to-speech/{voice_id}")
+async def text_to_speech(voice_id: str, request: Request):
+    payload = await request.json()
+    text = payload.get("text", "")
+    await asyncio.sleep((FAKE_TTS_DELAY_MS + FAKE_TTS_MS_PER_CHAR * len(text)) / 1000)
+    return Response(fake_mp3(text), media_type="audio/mpeg")
+
+
+@app.post("/v1/text-to-speech/{voice_id}/stream")
+async def text_to_speech_stream(voice_id: str, request: Request):
+    return await text_to_speech(voice_id, request)
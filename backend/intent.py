@@ -1,7 +1,10 @@
 import os
 from functools import lru_cache
-from typing import List
-from transformers import pipeline
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from onnx_backend import classifier_pipeline
 
 LABELS: List[str] = [
     "venting",
@@ -14,18 +17,140 @@ LABELS: List[str] = [
     "other",
 ]
 
+# INTENT_ENGINE=zsc runs one NLI pass per label; INTENT_ENGINE=embedding embeds the
+# utterance once and compares it against label vectors computed at startup
+INTENT_ENGINE = os.getenv("INTENT_ENGINE", "zsc")
+INTENT_ZSC_MODEL = os.getenv("INTENT_ZSC_MODEL", "typeform/distilbert-base-uncased-mnli")
+INTENT_EMBED_MODEL = os.getenv("INTENT_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+INTENT_MODEL = INTENT_EMBED_MODEL if INTENT_ENGINE == "embedding" else INTENT_ZSC_MODEL
+
+# short prototype utterances per label, averaged into one vector each
+LABEL_PROTOTYPES: Dict[str, List[str]] = {
+    "venting": [
+        "I just need to get this off my chest.",
+        "I'm so frustrated, I need to rant for a minute.",
+        "Everything is annoying me and I want to vent.",
+    ],
+    "stress": [
+        "I have way too much going on and I'm stressed.",
+        "The pressure at work is getting to me.",
+        "I'm overwhelmed by deadlines.",
+    ],
+    "anxiety": [
+        "I keep worrying about what might go wrong.",
+        "I feel anxious and my mind won't stop racing.",
+        "I'm nervous all the time and can't relax.",
+    ],
+    "relationship": [
+        "My partner and I keep fighting.",
+        "I'm having problems with my friend.",
+        "Things with my family are tense.",
+    ],
+    "goal_setting": [
+        "I want to build a better routine.",
+        "Help me plan how to reach my goal.",
+        "I'm trying to start exercising more consistently.",
+    ],
+    "burnout": [
+        "I'm completely exhausted and have nothing left to give.",
+        "I've been working nonstop and feel drained.",
+        "I don't have the energy to care about my job anymore.",
+    ],
+    "grief": [
+        "I lost someone I love and I miss them.",
+        "My dog died last week.",
+        "I'm grieving and it still hurts.",
+    ],
+    "other": [
+        "Just checking in.",
+        "What's the weather like today?",
+        "Tell me something interesting.",
+    ],
+}
+
 @lru_cache(maxsize=1)
 def _zsc():
     # using a zero shot classifier
-    model_name = os.getenv("INTENT_ZSC_MODEL", "typeform/distilbert-base-uncased-mnli")
-    return pipeline("zero-shot-classification", model=model_name)
+    return classifier_pipeline("zero-shot-classification", INTENT_ZSC_MODEL)
 
-def classify_intent(text: str) -> str:
-    text = (text or "").strip()
-    if not text:
-        return "other"
+@lru_cache(maxsize=1)
+def _embedder():
+    return classifier_pipeline("feature-extraction", INTENT_EMBED_MODEL)
+
+def _embed(texts: List[str]) -> np.ndarray:
+    # mean-pooled, L2-normalised sentence vectors, one row per text
+    outputs = _embedder()(texts, truncation=True, batch_size=len(texts))
+    vectors = []
+    for out in outputs:
+        tokens = np.asarray(out, dtype=np.float32)
+        if tokens.ndim == 3:
+            tokens = tokens[0]
+        vectors.append(tokens.mean(axis=0))
+    matrix = np.stack(vectors)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-9)
+
+@lru_cache(maxsize=1)
+def _label_vectors() -> np.ndarray:
+    rows = []
+    for label in LABELS:
+        centroid = _embed(LABEL_PROTOTYPES[label]).mean(axis=0)
+        rows.append(centroid / max(float(np.linalg.norm(centroid)), 1e-9))
+    return np.stack(rows)
+
+def _top_label(result) -> Tuple[str, float]:
+    if not result.get("labels"):
+        return "other", 0.0
+    top, score = result["labels"][0], float(result["scores"][0])
+    return (top if top in LABELS else "other"), score
 
+def classify_intent_zsc_scored(texts: List[str]) -> List[Tuple[str, float]]:
     zsc = _zsc()
-    result = zsc(text, candidate_labels=LABELS, multi_label=False)
-    top = result["labels"][0] if result.get("labels") else "other"
-    return top if top in LABELS else "other"
+    results = zsc(
+        texts,
+        candidate_labels=LABELS,
+        multi_label=False,
+        batch_size=len(LABELS) * len(texts),
+    )
+    if isinstance(results, dict):
+        results = [results]
+    return [_top_label(result) for result in results]
+
+def classify_intent_zsc(texts: List[str]) -> List[str]:
+    return [label for label, _score in classify_intent_zsc_scored(texts)]
+
+def classify_intent_embedding_scored(texts: List[str]) -> List[Tuple[str, float]]:
+    # score is the cosine similarity to the winning label's centroid
+    scores = _embed(texts) @ _label_vectors().T
+    return [(LABELS[int(i)], float(row[i])) for row, i in zip(scores, scores.argmax(axis=1))]
+
+def classify_intent_embedding(texts: List[str]) -> List[str]:
+    return [label for label, _score in classify_intent_embedding_scored(texts)]
+
+def load_intent_model() -> None:
+    if INTENT_ENGINE == "embedding":
+        _embedder()
+    else:
+        _zsc()
+
+def warm_intent() -> None:
+    # first forward pass (and, for the embedding engine, the label vectors)
+    classify_intent_batch(["I just need to talk for a minute."])
+
+def classify_intent_with_score_batch(texts: List[str]) -> List[Tuple[str, float]]:
+    # one padded forward pass for every text instead of one call per text
+    texts = [(t or "").strip() for t in texts]
+    out: List[Tuple[str, float]] = [("other", 0.0)] * len(texts)
+    todo = [i for i, t in enumerate(texts) if t]
+    if not todo:
+        return out
+
+    engine = classify_intent_embedding_scored if INTENT_ENGINE == "embedding" else classify_intent_zsc_scored
+    for i, result in zip(todo, engine([texts[i] for i in todo])):
+        out[i] = result
+    return out
+
+def classify_intent_batch(texts: List[str]) -> List[str]:
+    return [label for label, _score in classify_intent_with_score_batch(texts)]
+
+def classify_intent(text: str) -> str:
+    return classify_intent_batch([text])[0]
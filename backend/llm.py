@@ -1,8 +1,20 @@
 import json
 import os
 import re
-from typing import Dict, List, AsyncGenerator
-from openai import OpenAI
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, AsyncGenerator, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI
+
+# one client (and connection pool) for the whole process; connection setup to Groq
+# was showing up in every turn when a client was built per call
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+LLM_KEEPALIVE_S = float(os.getenv("LLM_KEEPALIVE_S", "120"))
+LLM_CONNECT_TIMEOUT_S = float(os.getenv("LLM_CONNECT_TIMEOUT_S", "5"))
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
 
 SYSTEM_PROMPT = (
     "You are a supportive reflective-listening coach for practice and education. "
@@ -34,12 +46,78 @@ PLAN_PROMPT = (
     'inside "core" separated by " | " (pipe).\n'
 )
 
-def _client() -> OpenAI:
+class _ConnectionStats:
+    # fed by httpx's per-request trace hook: a request that did not open a TCP
+    # connection went out on a pooled keep-alive one
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.connect_ms = 0.0
+
+    async def on_request(self, request: httpx.Request) -> None:
+        mark: List[float] = []
+
+        async def trace(event: str, info: Dict[str, Any]) -> None:
+            # TCP connect plus TLS handshake time, only on requests that opened a connection
+            if event == "connection.connect_tcp.started":
+                mark[:] = [time.perf_counter()]
+            elif event in ("connection.connect_tcp.complete", "connection.start_tls.complete") and mark:
+                now = time.perf_counter()
+                with self._lock:
+                    self.connect_ms += (now - mark[0]) * 1000
+                    if event == "connection.connect_tcp.complete":
+                        self.connections += 1
+                mark[:] = [now]
+
+        request.extensions["trace"] = trace
+        with self._lock:
+            self.requests += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            reused = max(0, self.requests - self.connections)
+            return {
+                "requests": self.requests,
+                "new_connections": self.connections,
+                "reused": reused,
+                "reuse_rate": reused / self.requests if self.requests else 0.0,
+                "avg_connect_ms": self.connect_ms / self.connections if self.connections else 0.0,
+            }
+
+_connection_stats = _ConnectionStats()
+_llm_client: Optional[AsyncOpenAI] = None
+
+def _client() -> AsyncOpenAI:
+    global _llm_client
+    if _llm_client is not None:
+        return _llm_client
     api_key = os.getenv("GROQ_API_KEY")
     base_url = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
     if not api_key:
         raise RuntimeError("Missing GROQ_API_KEY (set it in backend/.env).")
-    return OpenAI(api_key=api_key, base_url=base_url)
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_CONNECTIONS,
+            keepalive_expiry=LLM_KEEPALIVE_S,
+        ),
+        timeout=httpx.Timeout(LLM_TIMEOUT_S, connect=LLM_CONNECT_TIMEOUT_S),
+        event_hooks={"request": [_connection_stats.on_request]},
+    )
+    _llm_client = AsyncOpenAI(
+        api_key=api_key, base_url=base_url, http_client=http_client, max_retries=LLM_MAX_RETRIES
+    )
+    return _llm_client
+
+def llm_stats() -> Dict[str, float]:
+    return _connection_stats.stats()
+
+async def close_llm_client() -> None:
+    global _llm_client
+    if _llm_client is not None:
+        await _llm_client.close()
+        _llm_client = None
 
 def _model() -> str:
     return os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
@@ -68,17 +146,132 @@ def _fallback_plan(mode: str, user_text: str) -> Dict[str, str]:
         "tagline": "",
     }
 
-def plan_response_json(
+_JSON_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+class IncrementalJsonFields:
+    # Pulls top-level string fields out of a JSON object while it is still streaming.
+    # feed() returns (key, decoded_delta, done) events; nested values, numbers and any
+    # text around the object (e.g. markdown fences) are skipped. The raw text is kept
+    # so the complete object can still go through _extract_json at the end.
+
+    def __init__(self):
+        self.raw: List[str] = []
+        self._state = "start"
+        self._key: List[str] = []
+        self._current = ""
+        self._escape = False
+        self._hex: Optional[str] = None
+        self._high_surrogate: Optional[int] = None
+        self._depth = 0
+        self._nested_string = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self.raw)
+
+    def _decode_char(self, ch: str) -> str:
+        # returns the decoded character(s) for one input char inside a string, if any
+        if self._hex is not None:
+            self._hex += ch
+            if len(self._hex) < 4:
+                return ""
+            code, self._hex = int(self._hex, 16), None
+            if 0xD800 <= code < 0xDC00:
+                self._high_surrogate = code
+                return ""
+            if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+                code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+            self._high_surrogate = None
+            return chr(code)
+        if self._escape:
+            self._escape = False
+            if ch == "u":
+                self._hex = ""
+                return ""
+            return _JSON_ESCAPES.get(ch, ch)
+        if ch == "\\":
+            self._escape = True
+            return ""
+        return ch
+
+    def feed(self, chunk: str) -> List[Tuple[str, str, bool]]:
+        self.raw.append(chunk)
+        events: List[Tuple[str, str, bool]] = []
+        pending: List[str] = []
+
+        def flush(done: bool) -> None:
+            if pending or done:
+                events.append((self._current, "".join(pending), done))
+                pending.clear()
+
+        for ch in chunk:
+            state = self._state
+            if state == "start":
+                if ch == "{":
+                    self._state = "key_wait"
+            elif state == "key_wait":
+                if ch == '"':
+                    self._key = []
+                    self._state = "key"
+                elif ch == "}":
+                    self._state = "done"
+            elif state == "key":
+                if ch == '"' and not self._escape:
+                    self._current = "".join(self._key)
+                    self._state = "colon"
+                else:
+                    self._key.append(self._decode_char(ch))
+            elif state == "colon":
+                if ch == ":":
+                    self._state = "value_wait"
+            elif state == "value_wait":
+                if ch == '"':
+                    self._state = "string"
+                elif ch in "{[":
+                    self._depth = 1
+                    self._state = "nested"
+                elif not ch.isspace():
+                    self._state = "scalar"
+            elif state == "string":
+                if ch == '"' and not self._escape and self._hex is None:
+                    flush(True)
+                    self._state = "key_wait"
+                else:
+                    pending.append(self._decode_char(ch))
+            elif state == "nested":
+                if self._nested_string:
+                    if self._escape:
+                        self._escape = False
+                    elif ch == "\\":
+                        self._escape = True
+                    elif ch == '"':
+                        self._nested_string = False
+                elif ch == '"':
+                    self._nested_string = True
+                elif ch in "{[":
+                    self._depth += 1
+                elif ch in "}]":
+                    self._depth -= 1
+                    if not self._depth:
+                        self._state = "key_wait"
+            elif state == "scalar":
+                if ch == ",":
+                    self._state = "key_wait"
+                elif ch == "}":
+                    self._state = "done"
+
+        if self._state == "string":
+            flush(False)
+        return events
+
+def _plan_messages(
     history: List[Dict[str, str]],
     user_text: str,
     intent: str,
     emotion: str,
     mode: str,
     disallowed_openers: List[str],
-) -> Dict[str, str]:
-    client = _client()
-    model = _model()
-
+) -> List[Dict[str, str]]:
     messages: List[Dict[str, str]] = [{"role": "system", "content": PLAN_PROMPT}]
     if history:
         messages.extend(history[-10:])
@@ -90,20 +283,9 @@ def plan_response_json(
         f"User: {user_text}"
     )
     messages.append({"role": "user", "content": user_payload})
+    return messages
 
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        temperature=0.7,
-        stream=False,
-    )
-
-    content = ""
-    try:
-        content = response.choices[0].message.content or ""
-    except Exception:
-        content = ""
-
+def _finalize_plan(content: str, mode: str, user_text: str) -> Dict[str, str]:
     plan = _extract_json(content)
     if not plan:
         return _fallback_plan(mode, user_text)
@@ -125,6 +307,67 @@ def plan_response_json(
 
     return plan
 
+async def plan_response_json(
+    history: List[Dict[str, str]],
+    user_text: str,
+    intent: str,
+    emotion: str,
+    mode: str,
+    disallowed_openers: List[str],
+) -> Dict[str, str]:
+    client = _client()
+    model = _model()
+
+    response = await client.chat.completions.create(
+        model=model,
+        messages=_plan_messages(history, user_text, intent, emotion, mode, disallowed_openers),
+        temperature=0.7,
+        stream=False,
+    )
+
+    content = ""
+    try:
+        content = response.choices[0].message.content or ""
+    except Exception:
+        content = ""
+
+    return _finalize_plan(content, mode, user_text)
+
+async def stream_plan_json(
+    history: List[Dict[str, str]],
+    user_text: str,
+    intent: str,
+    emotion: str,
+    mode: str,
+    disallowed_openers: List[str],
+) -> AsyncIterator[Dict[str, Any]]:
+    # Same plan as plan_response_json, but streamed: yields {"type": "field", ...}
+    # events for string fields as tokens arrive, then one {"type": "plan", ...}
+    # with the validated plan (or the fallback plan for malformed output).
+    client = _client()
+    model = _model()
+
+    stream = await client.chat.completions.create(
+        model=model,
+        messages=_plan_messages(history, user_text, intent, emotion, mode, disallowed_openers),
+        temperature=0.7,
+        stream=True,
+    )
+
+    parser = IncrementalJsonFields()
+    async for event in stream:
+        delta = ""
+        try:
+            delta = event.choices[0].delta.content or ""
+        except Exception:
+            delta = ""
+        if not delta:
+            continue
+        for key, text, done in parser.feed(delta):
+            yield {"type": "field", "key": key, "delta": text, "done": done}
+
+    yield {"type": "plan", "plan": _finalize_plan(parser.text, mode, user_text)}
+
 async def stream_reflective_response(
     history: List[Dict[str, str]],
     user_text: str,
@@ -140,14 +383,14 @@ async def stream_reflective_response(
 
     messages.append({"role": "user", "content": f"[intent={intent}] {user_text}"})
 
-    stream = client.chat.completions.create(
+    stream = await client.chat.completions.create(
         model=model,
         messages=messages,
         temperature=0.6,
         stream=True,
     )
 
-    for event in stream:
+    async for event in stream:
         delta = ""
         try:
             delta = event.choices[0].delta.content or ""
@@ -0,0 +1,227 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# seconds; covers sub-ms regex stages up to slow LLM plans and long TTS clips
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+_registry: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: observations per bucket (last slot is +Inf), and their sum
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[bisect_left(self.buckets, value)] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def timer(self, **labels: Any) -> Iterator[None]:
+        # only completed work is observed; a block that raises (or is cancelled) is not
+        start = time.perf_counter()
+        yield
+        self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            series = [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+        for key, counts, total in sorted(series):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = _labels(self.labelnames, key, [("le", _number(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    # Either set/inc/dec directly, or pass collect: a function returning
+    # {label values: value} that is called at scrape time.
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        collect: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self._collect = collect
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels: Any) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self) -> List[str]:
+        if self._collect is not None:
+            values = self._collect()
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in sorted(values.items())]
+
+
+class Counter(Gauge):
+    # only ever goes up; with collect, return running totals
+    kind = "counter"
+
+
+def render_metrics() -> str:
+    # Prometheus text exposition format (0.0.4)
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = Histogram(
+    "aura_stage_seconds",
+    "Wall time of one stage: decode, ASR, classifiers, mode, plan, render, TTS, send.",
+    ("stage",),
+)
+TIME_TO_META = Histogram(
+    "aura_time_to_meta_seconds",
+    "From the turn's trigger (message or end of speech) to the meta message being sent.",
+    ("endpoint",),
+)
+TIME_TO_FIRST_TOKEN = Histogram(
+    "aura_time_to_first_token_seconds",
+    "From the turn's trigger to the first reply token being sent.",
+    ("endpoint",),
+)
+TIME_TO_FIRST_AUDIO = Histogram(
+    "aura_time_to_first_audio_seconds",
+    "From the turn's trigger to the first audio frame, or the final message carrying an audio_url.",
+    ("endpoint",),
+)
+TURN_SECONDS = Histogram(
+    "aura_turn_seconds",
+    "From the turn's trigger until its reply, audio included, has been sent.",
+    ("endpoint",),
+)
+ACTIVE_WEBSOCKETS = Gauge("aura_active_websockets", "Open websocket connections.", ("endpoint",))
+
+
+def stage_span(stage: str):
+    return STAGE_SECONDS.timer(stage=stage)
+
+
+def observe_stages(timings_ms: Dict[str, float]) -> None:
+    for stage, ms in timings_ms.items():
+        STAGE_SECONDS.observe(ms / 1000, stage=stage)
+
+
+class TurnTimer:
+    # Stands in for the websocket while one turn is answered: forwards send_json and
+    # send_bytes, and records when the client got meta, the first token and the first
+    # audio, measured from when the turn was triggered.
+
+    def __init__(self, ws: Any, endpoint: str, started: Optional[float] = None):
+        self._ws = ws
+        self.endpoint = endpoint
+        self.started = time.perf_counter() if started is None else started
+        self._marked: set = set()
+
+    def _mark(self, histogram: Histogram) -> None:
+        if histogram in self._marked:
+            return
+        self._marked.add(histogram)
+        histogram.observe(time.perf_counter() - self.started, endpoint=self.endpoint)
+
+    async def send_json(self, message: Dict[str, Any]) -> None:
+        await self._ws.send_json(message)
+        kind = message.get("type")
+        if kind == "meta":
+            self._mark(TIME_TO_META)
+        elif kind == "token":
+            self._mark(TIME_TO_FIRST_TOKEN)
+        elif kind == "final" and message.get("audio_url"):
+            self._mark(TIME_TO_FIRST_AUDIO)
+
+    async def send_bytes(self, data: bytes) -> None:
+        await self._ws.send_bytes(data)
+        self._mark(TIME_TO_FIRST_AUDIO)
+
+    def finish(self) -> None:
+        self._mark(TURN_SECONDS)
@@ -0,0 +1,211 @@
+import asyncio
+import itertools
+import json
+import os
+import struct
+import time
+from collections import Counter
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# with MODEL_SERVER=1 the web workers load no models: ASR, intent and emotion go to
+# the model server process (python model_server.py) listening on MODEL_SERVER_SOCKET
+MODEL_SERVER = os.getenv("MODEL_SERVER", "0") == "1"
+MODEL_SERVER_SOCKET = os.getenv("MODEL_SERVER_SOCKET", "/tmp/aura-models.sock")
+# the server only listens once its models are loaded, so the first connect may wait a while
+MODEL_SERVER_CONNECT_TIMEOUT_S = float(os.getenv("MODEL_SERVER_CONNECT_TIMEOUT_S", "300"))
+MODEL_SERVER_TIMEOUT_S = float(os.getenv("MODEL_SERVER_TIMEOUT_S", "30"))
+# after the connection drops, retry with exponential backoff up to this
+MODEL_SERVER_RECONNECT_MAX_S = float(os.getenv("MODEL_SERVER_RECONNECT_MAX_S", "10"))
+
+# every message is a 4-byte big-endian length and a JSON object; audio samples never go
+# through the socket, only the name of a shared memory segment holding them
+_LENGTH = struct.Struct("!I")
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Dict[str, Any]:
+    (size,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+    return json.loads(await reader.readexactly(size))
+
+
+def write_frame(writer: asyncio.StreamWriter, message: Dict[str, Any]) -> None:
+    data = json.dumps(message, separators=(",", ":")).encode()
+    writer.write(_LENGTH.pack(len(data)) + data)
+
+
+def share_samples(audio: np.ndarray) -> SharedMemory:
+    # float32 samples in a new segment; the caller closes and unlinks it
+    audio = np.ascontiguousarray(audio, dtype=np.float32)
+    shm = SharedMemory(create=True, size=max(1, audio.nbytes))
+    np.ndarray(audio.shape, dtype=np.float32, buffer=shm.buf)[:] = audio
+    return shm
+
+
+def read_shared_samples(name: str, count: int) -> np.ndarray:
+    shm = SharedMemory(name=name)
+    try:
+        # the client owns the segment; stop this process's resource tracker from
+        # unlinking it (and warning about a "leak") when the server exits
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return np.ndarray((count,), dtype=np.float32, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+
+
+class ModelServerError(RuntimeError):
+    pass
+
+
+class ModelClient:
+    # One multiplexed connection per web worker: requests carry an id and replies are
+    # matched back to their waiting futures, so concurrent turns share the socket and
+    # the server batches them with every other worker's. A dropped connection fails
+    # whatever was in flight and is re-established by keep_connected() or the next call.
+    # transcribe() and stats() match AsrScheduler, so the client can stand in for it.
+
+    def __init__(self, path: str = MODEL_SERVER_SOCKET, timeout_s: float = MODEL_SERVER_TIMEOUT_S):
+        self.path = path
+        self.timeout_s = timeout_s
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connecting: Optional[asyncio.Lock] = None
+        self._lost: Optional[asyncio.Event] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._inflight: Counter = Counter()
+        self.requests = 0
+        self.errors = 0
+        self.connects = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self, timeout_s: float = MODEL_SERVER_CONNECT_TIMEOUT_S) -> None:
+        deadline = time.monotonic() + timeout_s
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() >= deadline:
+                    raise ModelServerError(f"no model server listening on {self.path}")
+                await asyncio.sleep(0.5)
+        self._reader, self._writer = reader, writer
+        self._lost = asyncio.Event()
+        self._reader_task = asyncio.create_task(self._read_replies(reader))
+        self.connects += 1
+
+    async def _ensure_connected(self, timeout_s: Optional[float] = None) -> asyncio.StreamWriter:
+        if self._connecting is None:
+            self._connecting = asyncio.Lock()
+        async with self._connecting:
+            if not self.connected:
+                await self.connect(timeout_s=self.timeout_s if timeout_s is None else timeout_s)
+        return self._writer
+
+    async def keep_connected(self, max_backoff_s: float = MODEL_SERVER_RECONNECT_MAX_S) -> None:
+        # runs for the worker's lifetime: once the server goes away, reconnects without
+        # waiting for a model call, so /ready (and the load balancer behind it) recovers
+        # as soon as the server is back
+        backoff = 0.5
+        while True:
+            if self.connected and self._lost is not None:
+                backoff = 0.5
+                await self._lost.wait()
+                continue
+            try:
+                await self._ensure_connected(timeout_s=0)
+            except (ModelServerError, OSError):
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, max_backoff_s)
+
+    async def _read_replies(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                reply = await read_frame(reader)
+                future = self._pending.pop(reply.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(reply)
+        except (asyncio.IncompleteReadError, ConnectionError, OSError):
+            pass
+        finally:
+            if self._reader is reader:
+                if self._writer is not None:
+                    self._writer.close()
+                self._reader = self._writer = None
+                if self._lost is not None:
+                    self._lost.set()
+            pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(ModelServerError("model server connection lost"))
+
+    async def call(self, op: str, **params: Any) -> Dict[str, Any]:
+        writer = await self._ensure_connected()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._inflight[op] += 1
+        self.requests += 1
+        try:
+            write_frame(writer, {"id": request_id, "op": op, **params})
+            await writer.drain()
+            reply = await asyncio.wait_for(future, self.timeout_s)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self._pending.pop(request_id, None)
+            self._inflight[op] -= 1
+        if "error" in reply:
+            self.errors += 1
+            raise ModelServerError(reply["error"])
+        return reply
+
+    async def transcribe(self, audio: np.ndarray, final: bool = False) -> List[Tuple[float, float, str]]:
+        shm = share_samples(audio)
+        try:
+            reply = await self.call("asr", shm=shm.name, samples=len(audio), final=final)
+        finally:
+            shm.close()
+            shm.unlink()
+        return [(start, end, word) for start, end, word in reply["words"]]
+
+    async def classify_intent_with_score(self, text: str) -> Tuple[str, float]:
+        reply = await self.call("intent", text=text)
+        return reply["label"], reply["score"]
+
+    async def classify_intent(self, text: str) -> str:
+        label, _score = await self.classify_intent_with_score(text)
+        return label
+
+    async def detect_emotion_with_score(self, text: str) -> Tuple[str, float]:
+        reply = await self.call("emotion", text=text)
+        return reply["label"], reply["score"]
+
+    async def health(self) -> Dict[str, Any]:
+        return await self.call("health")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self.connected,
+            "queued": sum(self._inflight.values()),
+            "inflight": {op: n for op, n in self._inflight.items() if n},
+            "requests": self.requests,
+            "errors": self.errors,
+            "connects": self.connects,
+        }
+
+    async def aclose(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+
+
+model_client: Optional[ModelClient] = ModelClient() if MODEL_SERVER else None
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import os
+import signal
+from typing import Any, Dict, List, Optional, Set
+
+from asr import AsrScheduler, create_asr_scheduler
+from classifiers import classifier_cache_stats, classifier_stats, classify_intent_local, detect_emotion_local
+from emotion import load_emotion_model, warm_emotion
+from executors import executor_stats
+from intent import load_intent_model, warm_intent
+from model_ipc import MODEL_SERVER_SOCKET, read_frame, read_shared_samples, write_frame
+from readiness import readiness
+
+# Hosts Whisper and the intent/emotion classifiers once per box for every web worker
+# started with MODEL_SERVER=1. Run from backend/:  python model_server.py
+# Requests from all workers share the same micro-batchers, so they batch together.
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class ModelServer:
+    def __init__(self, asr: AsrScheduler):
+        self.asr = asr
+        self.connections = 0
+        self.inflight = 0
+        self.requests = 0
+        self.errors = 0
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # requests on one connection are answered concurrently, replies in completion order
+        self.connections += 1
+        self._connections[asyncio.current_task()] = writer
+        send_lock = asyncio.Lock()
+        tasks: Set[asyncio.Task] = set()
+        try:
+            while True:
+                request = await read_frame(reader)
+                task = asyncio.create_task(self._answer(request, writer, send_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.connections -= 1
+            self._connections.pop(asyncio.current_task(), None)
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def _answer(self, request: Dict[str, Any], writer: asyncio.StreamWriter, send_lock: asyncio.Lock) -> None:
+        self.inflight += 1
+        self.requests += 1
+        try:
+            reply = {"id": request.get("id"), **await self._dispatch(request)}
+        except Exception as exc:
+            self.errors += 1
+            reply = {"id": request.get("id"), "error": f"{type(exc).__name__}: {exc}"}
+        finally:
+            self.inflight -= 1
+        async with send_lock:
+            write_frame(writer, reply)
+            await writer.drain()
+
+    async def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        if op == "asr":
+            audio = read_shared_samples(request["shm"], request["samples"])
+            words = await self.asr.transcribe(audio, final=bool(request.get("final")))
+            return {"words": words}
+        if op == "intent":
+            label, score = await classify_intent_local(request["text"])
+            return {"label": label, "score": score}
+        if op == "emotion":
+            label, score = await detect_emotion_local(request["text"])
+            return {"label": label, "score": score}
+        if op == "health":
+            return self.health()
+        raise ValueError(f"unknown op {op!r}")
+
+    async def close(self) -> None:
+        # lets every handler see EOF and finish instead of being cancelled mid-read
+        handlers = list(self._connections)
+        for writer in self._connections.values():
+            writer.close()
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            **readiness.status(),
+            "connections": self.connections,
+            "inflight": self.inflight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "batchers": {"asr": self.asr.stats(), **classifier_stats()},
+            "classifier_cache": classifier_cache_stats(),
+            "executors": executor_stats(),
+        }
+
+
+async def load_models() -> AsrScheduler:
+    schedulers: List[AsrScheduler] = []
+
+    def load_whisper() -> None:
+        schedulers.append(create_asr_scheduler())
+
+    await asyncio.gather(
+        readiness.load("whisper", load_whisper, lambda: schedulers[0].warm(), required=True),
+        readiness.load("intent", load_intent_model, warm_intent),
+        readiness.load("emotion", load_emotion_model, warm_emotion),
+    )
+    readiness.started = True
+    return schedulers[0]
+
+
+async def serve(path: str = MODEL_SERVER_SOCKET, stop: Optional[asyncio.Event] = None) -> None:
+    # only starts listening once the models are loaded, so a worker that can connect
+    # is never the first to wait on a model load
+    server = ModelServer(await load_models())
+    if os.path.exists(path):
+        os.unlink(path)
+    listener = await asyncio.start_unix_server(server.handle, path=path)
+    os.chmod(path, 0o660)
+    logger.info("model server listening on %s", path)
+
+    stop = stop or asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        async with listener:
+            await stop.wait()
+            listener.close()
+            await server.close()
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve())
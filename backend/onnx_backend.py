@@ -0,0 +1,106 @@
+import logging
+import os
+import platform
+import shutil
+from pathlib import Path
+from typing import Any, Dict
+
+from executors import MODEL_POOL_SIZE
+
+# transformers (and torch behind it) is only imported once a model is actually built, so
+# web workers using the model server (MODEL_SERVER=1) never load either.
+
+# "onnx" runs the HF classifiers as int8 dynamically quantized ONNX graphs on ONNX
+# Runtime. Needs the optional optimum package (pip install "optimum[onnxruntime]");
+# without it, or if a model fails to export, that model falls back to the
+# transformers/PyTorch pipeline with a warning.
+CLASSIFIER_BACKEND = os.getenv("CLASSIFIER_BACKEND", "torch")
+# exported + quantized models, one directory per model id; built on first load
+ONNX_CACHE_DIR = Path(os.getenv("ONNX_CACHE_DIR", str(Path(__file__).parent / "models" / "onnx")))
+# the model pool already runs MODEL_POOL_SIZE inferences side by side, so each session
+# gets an equal share of the cores instead of every session spinning up one per core
+ONNX_INTRA_OP_THREADS = int(
+    os.getenv("ONNX_INTRA_OP_THREADS", str(max(1, (os.cpu_count() or 1) // MODEL_POOL_SIZE)))
+)
+
+logger = logging.getLogger("uvicorn.error")
+
+_QUANTIZED_FILE = "model_quantized.onnx"
+
+# model id -> backend actually in use, for /stats
+active_backends: Dict[str, str] = {}
+
+
+def _ort_class(task: str):
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTModelForSequenceClassification
+
+    # zero-shot classification is an NLI sequence classifier underneath
+    return ORTModelForFeatureExtraction if task == "feature-extraction" else ORTModelForSequenceClassification
+
+
+def _quantization_config():
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+    return AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+
+
+def export_quantized(task: str, model_name: str) -> Path:
+    # exports model_name to ONNX and writes an int8 dynamically quantized copy next to
+    # it; a finished export is reused. Built in a scratch directory and renamed, so
+    # workers starting together never load a half-written model.
+    target = ONNX_CACHE_DIR / model_name.replace("/", "--")
+    if (target / _QUANTIZED_FILE).exists():
+        return target
+
+    from optimum.onnxruntime import ORTQuantizer
+    from transformers import AutoTokenizer
+
+    scratch = target.with_name(f"{target.name}.tmp-{os.getpid()}")
+    shutil.rmtree(scratch, ignore_errors=True)
+    model = _ort_class(task).from_pretrained(model_name, export=True)
+    model.save_pretrained(scratch)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(scratch)
+    ORTQuantizer.from_pretrained(scratch).quantize(save_dir=scratch, quantization_config=_quantization_config())
+    try:
+        scratch.rename(target)
+    except OSError:
+        # another worker finished first
+        shutil.rmtree(scratch, ignore_errors=True)
+    return target
+
+
+def onnx_pipeline(task: str, model_name: str, **kwargs: Any):
+    import onnxruntime
+    from transformers import AutoTokenizer, pipeline
+
+    directory = export_quantized(task, model_name)
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = ONNX_INTRA_OP_THREADS
+    options.inter_op_num_threads = 1
+    options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    model = _ort_class(task).from_pretrained(
+        directory, file_name=_QUANTIZED_FILE, session_options=options, provider="CPUExecutionProvider"
+    )
+    # same transformers pipeline class as the PyTorch path, so pre/post-processing and
+    # the output format are identical
+    return pipeline(task, model=model, tokenizer=AutoTokenizer.from_pretrained(directory), **kwargs)
+
+
+def classifier_pipeline(task: str, model_name: str, **kwargs: Any):
+    from transformers import pipeline
+
+    if CLASSIFIER_BACKEND == "onnx":
+        try:
+            pipe = onnx_pipeline(task, model_name, **kwargs)
+            active_backends[model_name] = "onnx-int8"
+            return pipe
+        except ImportError:
+            logger.warning("CLASSIFIER_BACKEND=onnx but optimum is not installed; using PyTorch for %s", model_name)
+        except Exception:
+            logger.exception("ONNX export/load of %s failed; using PyTorch", model_name)
+    pipe = pipeline(task, model=model_name, **kwargs)
+    active_backends[model_name] = "torch"
+    return pipe
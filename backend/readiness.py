@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+from executors import run_io, run_model
+
+# run one dummy inference per model at startup so the first turn skips the JIT/page-in cost
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "1") == "1"
+# abort startup when any model fails to load or warm up; otherwise the worker stays up,
+# /ready answers 503 and the classifiers retry their load on first use
+MODEL_FAIL_FAST = os.getenv("MODEL_FAIL_FAST", "0") == "1"
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class Readiness:
+    # Startup state of each model: status (loading, warming, ready, failed), load and
+    # warm-up wall time, and the error if it failed. Served by /ready.
+
+    def __init__(self):
+        self.models: Dict[str, Dict[str, Any]] = {}
+        self.started = False
+
+    async def load(
+        self,
+        name: str,
+        load_fn: Callable[[], Any],
+        warm_fn: Optional[Callable[[], Any]] = None,
+        required: bool = False,
+    ) -> bool:
+        # loads run on the I/O pool so several models load at once (the model pool may
+        # be a single thread); warm-up inference runs where inference normally does.
+        # load_fn may also be a coroutine function (connecting to the model server).
+        entry = self.models[name] = {"status": "loading"}
+        try:
+            start = time.perf_counter()
+            if asyncio.iscoroutinefunction(load_fn):
+                await load_fn()
+            else:
+                await run_io(load_fn)
+            entry["load_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            if warm_fn is not None and MODEL_WARMUP:
+                entry["status"] = "warming"
+                start = time.perf_counter()
+                await run_model(warm_fn)
+                entry["warm_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        except Exception as exc:
+            entry["status"] = "failed"
+            entry["error"] = f"{type(exc).__name__}: {exc}"
+            logger.exception("loading model %s failed", name)
+            if required or MODEL_FAIL_FAST:
+                raise
+            return False
+        entry["status"] = "ready"
+        logger.info(
+            "model %s ready (load %.0f ms, warm-up %.0f ms)", name, entry["load_ms"], entry.get("warm_ms", 0.0)
+        )
+        return True
+
+    @property
+    def ready(self) -> bool:
+        return self.started and all(m["status"] == "ready" for m in self.models.values())
+
+    def status(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "models": {name: dict(m) for name, m in self.models.items()}}
+
+
+readiness = Readiness()
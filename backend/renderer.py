@@ -1,6 +1,6 @@
 import re
 import random
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 OPENERS = {
     "reflection": [
@@ -95,7 +95,7 @@ def _combine_opener(opener: str, sentence: str) -> str:
     return sentence
 
 
-def _choose_opener(mode: str, last_openers: List[str], seed: str) -> str:
+def choose_opener(mode: str, last_openers: List[str], seed: str) -> str:
     options = OPENERS.get(mode, OPENERS["reflection"])
     candidates = [o for o in options if o not in last_openers] or options
     rng = random.Random(hash(seed))
@@ -108,14 +108,16 @@ def render_from_plan(
     intent: str,
     emotion: str,
     last_openers: List[str],
+    opener: Optional[str] = None,
 ) -> str:
     reflection = _trim_sentences(plan.get("reflection", ""), 1)
     core = _trim_sentences(plan.get("core", ""), 4)
     question = _trim_sentences(plan.get("question", ""), 1)
     tagline = _trim_sentences(plan.get("tagline", ""), 1)
 
-    seed = f"{mode}|{intent}|{emotion}|{reflection}|{core}|{question}"
-    opener = _choose_opener(mode, last_openers, seed)
+    if opener is None:
+        seed = f"{mode}|{intent}|{emotion}|{reflection}|{core}|{question}"
+        opener = choose_opener(mode, last_openers, seed)
     if opener:
         last_openers.append(opener)
         if len(last_openers) > 5:
@@ -161,3 +163,71 @@ def render_from_plan(
     if question:
         parts.append(question)
     return "\n".join([p for p in parts if p])
+
+
+# modes whose first two parts are "<opener> <reflection>" and then the plain core text
+_PLAIN_CORE_MODES = {"reflection", "compassion", "reframe", "summary", "values"}
+_SENTENCE_GAP = re.compile(r"(?<=[.!?])\s+")
+
+
+class PlanStreamRenderer:
+    # Renders the start of a response while the plan is still streaming: the opener
+    # right away, then the reflection and (for plain-text modes) the core, following
+    # the same trimming/casing rules as render_from_plan. render_from_plan still
+    # produces the final text; what is emitted here is meant to be a prefix of it.
+
+    def __init__(self, mode: str, opener: str):
+        self.mode = mode
+        self.opener = opener.strip()
+        self.emitted = ""
+        self._fields: Dict[str, str] = {"reflection": "", "core": ""}
+        self._done: Dict[str, bool] = {}
+        self._stopped = False
+
+    def start(self) -> str:
+        return self._emit(self.opener)
+
+    def _emit(self, text: str) -> str:
+        self.emitted += text
+        return text
+
+    def _visible(self, key: str, max_sentences: int) -> str:
+        # same sentence split/join as _trim_sentences, applied to a partial field
+        text = _SENTENCE_GAP.sub(" ", self._fields[key].lstrip())
+        ends = [m.start() for m in _SENTENCE_GAP.finditer(self._fields[key].lstrip())]
+        if len(ends) >= max_sentences:
+            return " ".join(_split_sentences(text)[:max_sentences])
+        # hold back trailing whitespace until more text follows
+        return text.strip() if self._done.get(key) else text.rstrip()
+
+    def _complete(self, key: str) -> bool:
+        return self._done.get(key, False) or bool(_SENTENCE_GAP.search(self._fields[key].lstrip()))
+
+    def _target(self) -> str:
+        reflection = self._visible("reflection", 1)
+        if not reflection:
+            return self.opener
+        if self.opener and reflection[0].isupper():
+            reflection = reflection[0].lower() + reflection[1:]
+        head = f"{self.opener} {reflection}" if self.opener else reflection
+        if not self._complete("reflection"):
+            return head
+
+        if head[-1] not in ".!?":
+            head += "."
+        if self.mode not in _PLAIN_CORE_MODES:
+            return head
+        core = self._visible("core", 4)
+        return f"{head}\n{core}" if core else head
+
+    def feed(self, key: str, delta: str, done: bool = False) -> str:
+        if self._stopped or key not in self._fields:
+            return ""
+        self._fields[key] += delta
+        self._done[key] = done
+        target = self._target()
+        if not target.startswith(self.emitted):
+            # diverged from what rendering will produce; the final render takes over
+            self._stopped = True
+            return ""
+        return self._emit(target[len(self.emitted) :])
@@ -0,0 +1,108 @@
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Optional, Tuple
+
+# classifier results for short utterances that repeat across sessions ("yeah",
+# "I don't know", "thanks"); 0 disables the cache
+CLASSIFIER_CACHE_SIZE = int(os.getenv("CLASSIFIER_CACHE_SIZE", "4096"))
+CLASSIFIER_CACHE_TTL_S = float(os.getenv("CLASSIFIER_CACHE_TTL_S", "3600"))
+# longer utterances are almost never repeated word for word; keep them from churning the LRU
+CLASSIFIER_CACHE_MAX_CHARS = int(os.getenv("CLASSIFIER_CACHE_MAX_CHARS", "120"))
+
+Result = Tuple[str, float]
+
+_PUNCTUATION = re.compile(r"[^\w\s']+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_utterance(text: str) -> str:
+    # "Yeah." / "yeah!" / "  YEAH " are one entry; apostrophes stay so "we'll" != "well"
+    text = (text or "").casefold().replace("’", "'").replace("‘", "'")
+    return _SPACES.sub(" ", _PUNCTUATION.sub(" ", text)).strip()
+
+
+class ResultCache:
+    # LRU of (label, score) keyed by (model name, normalized text), shared by every
+    # classifier. Entries older than ttl_s count as misses and are dropped, so a model
+    # swapped under the same name is picked up within ttl_s. Thread-safe: the batchers'
+    # callers and the model server's executor threads may all use it.
+
+    def __init__(self, max_entries: int, ttl_s: float, max_chars: int):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, float, float]]" = OrderedDict()
+        self._hits: Counter = Counter()
+        self._misses: Counter = Counter()
+        self._expired: Counter = Counter()
+        self._evictions = 0
+        self._skipped = 0
+
+    def _key(self, model: str, text: str) -> Optional[Tuple[str, str]]:
+        if self.max_entries <= 0:
+            return None
+        normalized = normalize_utterance(text)
+        if not normalized or len(normalized) > self.max_chars:
+            return None
+        return model, normalized
+
+    def get(self, model: str, text: str) -> Optional[Result]:
+        key = self._key(model, text)
+        with self._lock:
+            if key is None:
+                self._skipped += 1
+                return None
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[2] > self.ttl_s:
+                del self._entries[key]
+                self._expired[model] += 1
+                entry = None
+            if entry is None:
+                self._misses[model] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits[model] += 1
+            return entry[0], entry[1]
+
+    def put(self, model: str, text: str, result: Result) -> None:
+        key = self._key(model, text)
+        if key is None:
+            return
+        label, score = result
+        with self._lock:
+            self._entries[key] = (label, float(score), time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            models = {}
+            for model in sorted(set(self._hits) | set(self._misses)):
+                hits, misses = self._hits[model], self._misses[model]
+                models[model] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "expired": self._expired[model],
+                    "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                }
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "evictions": self._evictions,
+                "skipped": self._skipped,
+                "models": models,
+            }
+
+
+classifier_cache = ResultCache(CLASSIFIER_CACHE_SIZE, CLASSIFIER_CACHE_TTL_S, CLASSIFIER_CACHE_MAX_CHARS)
@@ -1,4 +1,5 @@
 import re
+from typing import Optional, Tuple
 
 #safety stuff
 HIGH_RISK_PATTERNS = [
@@ -20,15 +21,68 @@ MEDIUM_RISK_PATTERNS = [
     r"\bpanic attack\b",
 ]
 
+# all patterns in one alternation, one named group each, so a single scan finds
+# every hit and reports which pattern it was
+_RISK_PATTERNS = [("high", p) for p in HIGH_RISK_PATTERNS] + [("medium", p) for p in MEDIUM_RISK_PATTERNS]
+_RISK_RE = re.compile("|".join(f"(?P<p{i}>{p})" for i, (_level, p) in enumerate(_RISK_PATTERNS)))
+_LEVEL_RANK = {"none": 0, "medium": 1, "high": 2}
+# longest stretch of text a single pattern can span; rescanned around chunk edges
+_MAX_MATCH_CHARS = 40
+
+def _normalize(text: str) -> str:
+    return (text or "").lower().replace("\u2019", "'")
+
+def _word_start(text: str, start: int) -> int:
+    # back a slice start up to whitespace, so \b never sees a cut word as a word
+    # ("spend my life" cut to "end my life")
+    start = max(0, start)
+    while start > 0 and not text[start - 1].isspace():
+        start -= 1
+    return start
+
+def _scan(t: str) -> Tuple[str, Optional[str]]:
+    level, pattern = "none", None
+    for match in _RISK_RE.finditer(t):
+        hit_level, hit_pattern = _RISK_PATTERNS[int(match.lastgroup[1:])]
+        if _LEVEL_RANK[hit_level] > _LEVEL_RANK[level]:
+            level, pattern = hit_level, hit_pattern
+            if level == "high":
+                break
+    return level, pattern
+
+def risk_match(text: str) -> Tuple[str, Optional[str]]:
+    # (level, matched pattern) in one pass; high wins over medium wherever it occurs
+    return _scan(_normalize(text))
+
 def risk_level_from_text(text: str) -> str:
-    t = (text or "").lower()
-    for p in HIGH_RISK_PATTERNS:
-        if re.search(p, t):
-            return "high"
-    for p in MEDIUM_RISK_PATTERNS:
-        if re.search(p, t):
-            return "medium"
-    return "none"
+    return risk_match(text)[0]
+
+class RiskScanner:
+    # Checks a transcript while it is still being spoken. The stable part only ever
+    # grows, so each call scans just the newly committed text (plus a short overlap
+    # for phrases split across updates); the tentative tail is rescanned every time.
+    # A hit in stable text sticks; a tentative hit counts only while it is there.
+
+    def __init__(self):
+        self._stable = ""
+        self.level = "none"
+        self.pattern: Optional[str] = None
+
+    def feed(self, stable: str, tentative: str = "") -> Tuple[str, Optional[str]]:
+        stable = _normalize(stable)
+        if len(stable) > len(self._stable) and self.level != "high":
+            start = _word_start(stable, len(self._stable) - _MAX_MATCH_CHARS)
+            level, pattern = _scan(stable[start:])
+            if _LEVEL_RANK[level] > _LEVEL_RANK[self.level]:
+                self.level, self.pattern = level, pattern
+        self._stable = stable
+        if self.level == "high" or not tentative:
+            return self.level, self.pattern
+        tail = stable[_word_start(stable, len(stable) - _MAX_MATCH_CHARS) :]
+        level, pattern = _scan(tail + " " + _normalize(tentative))
+        if _LEVEL_RANK[level] > _LEVEL_RANK[self.level]:
+            return level, pattern
+        return self.level, self.pattern
 
 def safety_message() -> str:
     return (
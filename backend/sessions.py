@@ -0,0 +1,301 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+# idle sessions are dropped after this long; beyond SESSION_MAX the least recently used go first
+SESSION_TTL_S = float(os.getenv("SESSION_TTL_S", "3600"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))
+# only the last 10 messages ever reach the prompt
+SESSION_HISTORY_MAX = int(os.getenv("SESSION_HISTORY_MAX", "10"))
+RECENT_MAX = 5
+# "memory" keeps sessions in this process; "sqlite" shares them between uvicorn workers
+# (and replicas on one host) through a WAL-mode database file at SESSION_DB
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_DB = Path(os.getenv("SESSION_DB", str(Path(__file__).parent / "data" / "sessions.db")))
+SESSION_GC_INTERVAL_S = float(os.getenv("SESSION_GC_INTERVAL_S", "60"))
+
+# (kind, value): kind is "user"/"assistant" for messages, "mode" or "opener"
+Event = Tuple[str, str]
+
+
+class Session:
+    # Working copy of one conversation. For a shared store, every change is also queued
+    # in pending as one event; take_pending() hands them to the store's append(), so a
+    # turn never rewrites the whole session.
+
+    __slots__ = ("session_id", "history", "last_modes", "last_openers", "turn_index", "last_seen", "pending")
+
+    def __init__(self, session_id: str, journaled: bool = False):
+        self.session_id = session_id
+        self.pending: Optional[List[Event]] = [] if journaled else None
+        # (role, content) pairs; dicts are only built for the prompt
+        self.history: Deque[Tuple[str, str]] = deque(maxlen=SESSION_HISTORY_MAX)
+        # the last RECENT_MAX modes and openers, for rotation
+        self.last_modes: List[str] = []
+        self.last_openers: List[str] = []
+        # number of user messages so far, used to seed mode/opener choice
+        self.turn_index = 0
+        self.last_seen = time.monotonic()
+
+    def add_message(self, role: str, content: str) -> None:
+        self.history.append((role, content))
+        if role == "user":
+            self.turn_index += 1
+        if self.pending is not None:
+            self.pending.append((role, content))
+
+    def add_mode(self, mode: str) -> None:
+        self._add_recent(self.last_modes, "mode", mode)
+
+    def add_opener(self, opener: str) -> None:
+        if opener:
+            self._add_recent(self.last_openers, "opener", opener)
+
+    def _add_recent(self, recent: List[str], kind: str, value: str) -> None:
+        recent.append(value)
+        if len(recent) > RECENT_MAX:
+            del recent[:-RECENT_MAX]
+        if self.pending is not None:
+            self.pending.append((kind, value))
+
+    def take_pending(self) -> List[Event]:
+        if not self.pending:
+            return []
+        events, self.pending = self.pending, []
+        return events
+
+    def prompt_history(self) -> List[Dict[str, str]]:
+        return [{"role": role, "content": content} for role, content in self.history]
+
+    def approx_bytes(self) -> int:
+        size = sys.getsizeof(self) + sys.getsizeof(self.history)
+        size += sum(sys.getsizeof(content) for _role, content in self.history)
+        size += sum(sys.getsizeof(s) for s in self.last_modes + self.last_openers)
+        return size
+
+
+class SessionStore:
+    # Sessions in least-recently-used order. Lookups evict from the cold end: anything
+    # idle longer than ttl_s, then the oldest while there are more than max_sessions.
+    # Sessions are the stored objects themselves, so there is nothing to append.
+
+    blocking = False
+
+    def __init__(self, ttl_s: float = SESSION_TTL_S, max_sessions: int = SESSION_MAX):
+        self.ttl_s = ttl_s
+        self.max_sessions = max(1, max_sessions)
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+
+    def _evict(self, now: float) -> None:
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_seen > self.ttl_s:
+                self.evicted_idle += 1
+            elif len(self._sessions) > self.max_sessions:
+                self.evicted_lru += 1
+            else:
+                break
+            self._sessions.popitem(last=False)
+
+    def get(self, session_id: str) -> Session:
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = Session(session_id)
+                self._sessions[session_id] = session
+                self.created += 1
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_seen = now
+            self._evict(now)
+            return session
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def gc(self) -> None:
+        with self._lock:
+            self._evict(time.monotonic())
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            self._evict(time.monotonic())
+            sessions = list(self._sessions.values())
+            counts = {
+                "backend": "memory",
+                "sessions": len(sessions),
+                "created": self.created,
+                "evicted_idle": self.evicted_idle,
+                "evicted_lru": self.evicted_lru,
+            }
+        counts["history_messages"] = sum(len(s.history) for s in sessions)
+        counts["approx_bytes"] = sum(s.approx_bytes() for s in sessions)
+        return counts
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    turns INTEGER NOT NULL DEFAULT 0,
+    last_seen REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_session ON events (session_id, kind, seq);
+"""
+
+_RECENT_EVENTS = """
+SELECT kind, value FROM (
+    SELECT seq, kind, value FROM events WHERE session_id = ? AND kind IN ({kinds}) ORDER BY seq DESC LIMIT ?
+) ORDER BY seq
+"""
+
+
+class SqliteSessionStore:
+    # Sessions shared by every process that opens the same database file. A turn's
+    # changes are appended as event rows (plus a turn counter bump for user messages) in
+    # one short transaction; get() rebuilds a Session from the newest events, so
+    # whichever worker a reconnect lands on sees the same history. get() only reads,
+    # except to create a session; last_seen moves when a session is written. gc() drops
+    # idle sessions, the least recently used beyond max_sessions, and events past the caps.
+    #
+    # Usually sub-millisecond (WAL, synchronous=NORMAL), but a write waits up to 5 s
+    # while another worker holds the lock: call everything through run_io.
+
+    blocking = True
+
+    def __init__(
+        self,
+        path: Path = SESSION_DB,
+        ttl_s: float = SESSION_TTL_S,
+        max_sessions: int = SESSION_MAX,
+    ):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_sessions = max(1, max_sessions)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # this process only; other workers keep their own counts
+        self.created = 0
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # one connection per thread (event loop, I/O pool)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, session_id: str) -> Session:
+        conn = self._conn()
+        session = Session(session_id, journaled=True)
+        row = conn.execute("SELECT turns FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            with conn:
+                created = conn.execute(
+                    "INSERT OR IGNORE INTO sessions (session_id, last_seen) VALUES (?, ?)", (session_id, time.time())
+                ).rowcount
+            if created:
+                with self._lock:
+                    self.created += 1
+                return session
+            # another worker created it in the meantime
+            row = conn.execute("SELECT turns FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+
+        history = conn.execute(
+            _RECENT_EVENTS.format(kinds="'user', 'assistant'"), (session_id, SESSION_HISTORY_MAX)
+        ).fetchall()
+        modes = conn.execute(_RECENT_EVENTS.format(kinds="'mode'"), (session_id, RECENT_MAX)).fetchall()
+        openers = conn.execute(_RECENT_EVENTS.format(kinds="'opener'"), (session_id, RECENT_MAX)).fetchall()
+        session.history.extend(history)
+        session.last_modes.extend(value for _kind, value in modes)
+        session.last_openers.extend(value for _kind, value in openers)
+        session.turn_index = row[0] if row is not None else 0
+        return session
+
+    def append(self, session_id: str, events: List[Event]) -> None:
+        if not events:
+            return
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT INTO events (session_id, kind, value) VALUES (?, ?, ?)",
+                [(session_id, kind, value) for kind, value in events],
+            )
+            conn.execute(
+                "INSERT INTO sessions (session_id, turns, last_seen) VALUES (?, ?, ?) "
+                "ON CONFLICT (session_id) DO UPDATE SET turns = turns + excluded.turns, last_seen = excluded.last_seen",
+                (session_id, sum(1 for kind, _value in events if kind == "user"), time.time()),
+            )
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def gc(self) -> None:
+        conn = self._conn()
+        with conn:
+            idle = conn.execute("DELETE FROM sessions WHERE last_seen < ?", (time.time() - self.ttl_s,)).rowcount
+            lru = conn.execute(
+                "DELETE FROM sessions WHERE session_id IN "
+                "(SELECT session_id FROM sessions ORDER BY last_seen DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,),
+            ).rowcount
+            conn.execute("DELETE FROM events WHERE session_id NOT IN (SELECT session_id FROM sessions)")
+            conn.execute(
+                "DELETE FROM events WHERE seq IN (SELECT seq FROM ("
+                "  SELECT seq, kind, ROW_NUMBER() OVER ("
+                "    PARTITION BY session_id, CASE WHEN kind IN ('user', 'assistant') THEN 'message' ELSE kind END"
+                "    ORDER BY seq DESC"
+                "  ) AS age FROM events"
+                ") WHERE age > CASE WHEN kind IN ('user', 'assistant') THEN ? ELSE ? END)",
+                (SESSION_HISTORY_MAX, RECENT_MAX),
+            )
+        with self._lock:
+            self.evicted_idle += idle
+            self.evicted_lru += lru
+
+    def stats(self) -> Dict[str, float]:
+        conn = self._conn()
+        sessions = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        messages, size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM events WHERE kind IN ('user', 'assistant')"
+        ).fetchone()
+        with self._lock:
+            return {
+                "backend": "sqlite",
+                "sessions": sessions,
+                "created": self.created,
+                "evicted_idle": self.evicted_idle,
+                "evicted_lru": self.evicted_lru,
+                "history_messages": messages,
+                "approx_bytes": size,
+            }
+
+
+def _make_store():
+    if SESSION_BACKEND == "sqlite":
+        return SqliteSessionStore()
+    return SessionStore()
+
+
+session_store = _make_store()
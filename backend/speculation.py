@@ -0,0 +1,118 @@
+import asyncio
+import difflib
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from turn import turn_pipeline
+
+# start a turn's classifiers (and plan) while the user is still silent-but-not-done,
+# once the partial transcript has stopped changing for SPECULATE_STABLE_MS
+SPECULATIVE_TURNS = os.getenv("SPECULATIVE_TURNS", "0") == "1"
+SPECULATE_STABLE_MS = float(os.getenv("SPECULATE_STABLE_MS", "600"))
+# word-level similarity at which the final transcript still reuses the speculative work
+SPECULATE_MATCH_RATIO = float(os.getenv("SPECULATE_MATCH_RATIO", "0.9"))
+# the LLM plan is the expensive part to throw away; "0" speculates only up to mode/opener
+SPECULATE_PLAN = os.getenv("SPECULATE_PLAN", "1") == "1"
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def transcripts_match(a: str, b: str, ratio: float = SPECULATE_MATCH_RATIO) -> bool:
+    wa, wb = _WORD.findall(a.lower()), _WORD.findall(b.lower())
+    if wa == wb:
+        return True
+    if not wa or not wb:
+        return False
+    return difflib.SequenceMatcher(None, wa, wb, autojunk=False).ratio() >= ratio
+
+
+class _SpeculationStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = 0
+        self.committed = 0
+        self.cancelled = 0
+        self.failed = 0
+        # time speculative work ran before end_of_speech and was then used
+        self.saved_ms = 0.0
+        # time speculative work ran and was thrown away, and plans (LLM calls) among it
+        self.wasted_ms = 0.0
+        self.wasted_plans = 0
+
+    def add(self, **deltas: float) -> None:
+        with self._lock:
+            for key, value in deltas.items():
+                setattr(self, key, getattr(self, key) + value)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            resolved = self.committed + self.cancelled + self.failed
+            return {
+                "started": self.started,
+                "committed": self.committed,
+                "cancelled": self.cancelled,
+                "failed": self.failed,
+                "hit_rate": self.committed / resolved if resolved else 0.0,
+                "saved_ms": round(self.saved_ms, 1),
+                "wasted_ms": round(self.wasted_ms, 1),
+                "wasted_plans": self.wasted_plans,
+            }
+
+
+speculation_stats = _SpeculationStats()
+
+
+class Speculation:
+    # Runs the turn pipeline for a partial transcript in the background, without the
+    # emit hook and without the render stage, so nothing is sent and session state is
+    # untouched. commit() hands the finished ctx to run_turn if the final transcript
+    # still matches; anything else cancels it and counts the work as wasted.
+
+    def __init__(self, text: str, ctx: Dict[str, Any]):
+        self.text = text
+        self.ctx = ctx
+        self._started = time.perf_counter()
+        self._finished: Optional[float] = None
+        targets: List[str] = ["mode", "opener", "plan"] if SPECULATE_PLAN else ["mode", "opener"]
+        self._task = asyncio.create_task(turn_pipeline.run(ctx, targets))
+        self._task.add_done_callback(self._on_done)
+        speculation_stats.add(started=1)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._finished = time.perf_counter()
+        if not task.cancelled():
+            # retrieved here so a failed speculation never logs "exception was never retrieved"
+            task.exception()
+
+    def _ran_ms(self) -> float:
+        end = self._finished if self._finished is not None else time.perf_counter()
+        return (end - self._started) * 1000
+
+    def cancel(self) -> None:
+        if self._task.done() and not self._task.cancelled() and self._task.exception() is not None:
+            speculation_stats.add(failed=1)
+            return
+        self._task.cancel()
+        speculation_stats.add(
+            cancelled=1,
+            wasted_ms=self._ran_ms(),
+            wasted_plans=1 if SPECULATE_PLAN and "opener" in self.ctx else 0,
+        )
+
+    async def commit(self, final_text: str, turn_index: int) -> Optional[Dict[str, Any]]:
+        if self.ctx["turn_index"] != turn_index or not transcripts_match(self.text, final_text):
+            self.cancel()
+            return None
+        saved_ms = self._ran_ms()
+        try:
+            await self._task
+        except Exception:
+            speculation_stats.add(failed=1)
+            return None
+        speculation_stats.add(committed=1, saved_ms=saved_ms)
+        self.ctx["text"] = final_text
+        self.ctx["speculated"] = True
+        return self.ctx
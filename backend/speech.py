@@ -0,0 +1,120 @@
+import asyncio
+import os
+import re
+from typing import Awaitable, Callable, Optional, Tuple
+
+from tts_cache import tts_cache
+
+# default for streaming speech; clients can override per turn with "stream_audio"
+TTS_STREAMING = os.getenv("TTS_STREAMING", "0") == "1"
+# how many sentences may be synthesizing at once ahead of the one being sent
+TTS_STREAM_PARALLEL = int(os.getenv("TTS_STREAM_PARALLEL", "2"))
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n+")
+
+SendJson = Callable[[dict], Awaitable[None]]
+SendBytes = Callable[[bytes], Awaitable[None]]
+
+
+async def synthesize(text: str) -> bytes:
+    return await tts_cache.synthesize(text)
+
+
+class SentenceSpeaker:
+    # Splits response text into sentences as it streams in and starts TTS for each
+    # one as soon as it is complete. Audio goes to the client in sentence order as
+    # an {"type": "audio", ...} header followed by one binary frame, while later
+    # sentences are still being generated or synthesized.
+
+    def __init__(
+        self,
+        send_json: SendJson,
+        send_bytes: SendBytes,
+        synthesize_fn: Callable[[str], Awaitable[bytes]] = synthesize,
+        parallel: int = TTS_STREAM_PARALLEL,
+    ):
+        self._send_json = send_json
+        self._send_bytes = send_bytes
+        self._synthesize = synthesize_fn
+        self._slots = asyncio.Semaphore(max(1, parallel))
+        self._text = ""
+        self._consumed = 0
+        # (seq, sentence, synth task); a None task marks an audio_reset, None ends the turn
+        self._jobs: "asyncio.Queue[Optional[Tuple[int, str, Optional[asyncio.Task]]]]" = asyncio.Queue()
+        self._sender = asyncio.create_task(self._send_in_order())
+        self._seq = 0
+
+    def feed(self, delta: str) -> None:
+        self._text += delta
+        pending = self._text[self._consumed :]
+        last_break = None
+        for match in _SENTENCE_BREAK.finditer(pending):
+            last_break = match
+        if last_break is None:
+            return
+        for sentence in _SENTENCE_BREAK.split(pending[: last_break.start()]):
+            self._queue_sentence(sentence)
+        self._consumed += last_break.end()
+
+    def _queue_sentence(self, sentence: str) -> None:
+        sentence = sentence.strip()
+        if not sentence:
+            return
+        task = asyncio.create_task(self._synthesize_one(sentence))
+        self._jobs.put_nowait((self._seq, sentence, task))
+        self._seq += 1
+
+    async def _synthesize_one(self, sentence: str) -> bytes:
+        async with self._slots:
+            return await self._synthesize(sentence)
+
+    async def _send_in_order(self) -> None:
+        while True:
+            job = await self._jobs.get()
+            if job is None:
+                return
+            seq, sentence, task = job
+            if task is None:
+                await self._send_json({"type": "audio_reset"})
+                continue
+            try:
+                audio = await task
+            except Exception:
+                await self._send_json({"type": "audio", "seq": seq, "text": sentence, "error": "tts_failed"})
+                continue
+            await self._send_json(
+                {"type": "audio", "seq": seq, "text": sentence, "mime": "audio/mpeg", "bytes": len(audio)}
+            )
+            await self._send_bytes(audio)
+
+    async def finish(self, final_text: str) -> int:
+        # speaks whatever of final_text was not already covered by fed sentences;
+        # returns the number of audio segments queued for the turn
+        spoken = self._text[: self._consumed]
+        if final_text.startswith(spoken):
+            rest = final_text[len(spoken) :]
+        else:
+            # the rendered text diverged from the streamed preview: start over after what was sent
+            self._jobs.put_nowait((self._seq, "", None))
+            rest = final_text
+        for sentence in _SENTENCE_BREAK.split(rest):
+            self._queue_sentence(sentence)
+        return await self._close()
+
+    async def speak(self, text: str) -> int:
+        # a canned reply goes out as one segment so its cached audio is used as is
+        self._queue_sentence(text)
+        return await self._close()
+
+    async def _close(self) -> int:
+        self._jobs.put_nowait(None)
+        await self._sender
+        await self._send_json({"type": "audio_end", "count": self._seq})
+        return self._seq
+
+    def cancel(self) -> None:
+        self._sender.cancel()
+        while not self._jobs.empty():
+            job = self._jobs.get_nowait()
+            if job is not None and job[2] is not None:
+                job[2].cancel()
@@ -0,0 +1,39 @@
+import numpy as np
+
+from endpoint import Endpointer
+
+
+class FrombufferDecoder:
+    # mirrors StreamDecoder.samples() on the live path: a read-only np.frombuffer view
+    def __init__(self, audio: np.ndarray):
+        self._raw = audio.astype(np.float32).tobytes()
+
+    def sample_count(self) -> int:
+        return len(self._raw) // 4
+
+    def samples(self, start: int = 0) -> np.ndarray:
+        return np.frombuffer(self._raw, dtype=np.float32)[start:]
+
+
+def test_update_accepts_read_only_samples():
+    decoder = FrombufferDecoder(np.zeros(16000, dtype=np.float32))
+    assert not decoder.samples().flags.writeable
+
+    endpointer = Endpointer()
+    assert endpointer.update(decoder) is False
+    assert endpointer.trailing_silence_ms > 0
+
+
+def test_update_leaves_decoder_buffer_untouched():
+    audio = np.random.default_rng(0).uniform(-0.1, 0.1, 16000).astype(np.float32)
+    cached = audio.copy()
+
+    class CachedDecoder:
+        def sample_count(self) -> int:
+            return len(cached)
+
+        def samples(self, start: int = 0) -> np.ndarray:
+            return cached[start:]
+
+    Endpointer().update(CachedDecoder())
+    np.testing.assert_array_equal(cached, audio)
@@ -0,0 +1,59 @@
+import random
+
+from safety import RiskScanner, risk_level_from_text
+
+_RANK = {"none": 0, "medium": 1, "high": 2}
+
+FILLER = "i really do not want to so it is fine mostly lets keep going and ok well maybe".split()
+PHRASES = [["spend", "my", "life"], ["friend", "my", "life"], ["hopeless"], ["end", "my", "life"]]
+
+
+def _utterance(rng):
+    words, target = [], rng.randint(20, 60)
+    while len(words) < target:
+        words.extend([rng.choice(FILLER)] if rng.random() < 0.8 else rng.choice(PHRASES[:3]))
+    if rng.random() < 0.2:
+        words.extend(PHRASES[3])
+    return words
+
+
+def _stream(words, seed):
+    # (stable, tentative) pairs as StreamingTranscript produces them: stable grows,
+    # the tentative tail is whatever comes after it
+    rng = random.Random(seed)
+    committed = 0
+    while committed < len(words):
+        committed = min(len(words), committed + rng.randint(0, 3))
+        tentative = words[committed : committed + rng.randint(0, 4)]
+        yield " ".join(words[:committed]), " ".join(tentative)
+
+
+def test_cut_word_is_not_a_match():
+    text = "well i do not want to spend my life i really do not want to keep going"
+    assert risk_level_from_text(text) == "none"
+    scanner = RiskScanner()
+    words = text.split()
+    for n in range(1, len(words) + 1):
+        assert scanner.feed(" ".join(words[:n]))[0] == "none"
+
+
+def test_feed_agrees_with_full_text_scan():
+    rng = random.Random(0)
+    for seed in range(300):
+        words = _utterance(rng)
+        scanner = RiskScanner()
+        sticky = "none"
+        for stable, tentative in _stream(words, seed):
+            stable_level = risk_level_from_text(stable)
+            if _RANK[stable_level] > _RANK[sticky]:
+                sticky = stable_level
+            now = risk_level_from_text(f"{stable} {tentative}") if tentative else sticky
+            expected = max(sticky, now, key=_RANK.__getitem__)
+            assert scanner.feed(stable, tentative)[0] == expected, (stable, tentative)
+
+
+def test_phrase_split_across_updates_is_found():
+    scanner = RiskScanner()
+    assert scanner.feed("sometimes i want to")[0] == "none"
+    assert scanner.feed("sometimes i want to end my")[0] == "none"
+    assert scanner.feed("sometimes i want to end my life")[0] == "high"
@@ -0,0 +1,98 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+
+import fake_tts
+import tts
+from speech import SentenceSpeaker
+
+
+@pytest.fixture(scope="module")
+def fake_tts_url():
+    # fake_tts.py on a free local port, as in its header comment
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(fake_tts.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        assert time.monotonic() < deadline, "fake TTS server did not start"
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+@pytest.fixture
+def eleven(fake_tts_url, monkeypatch):
+    monkeypatch.setenv("ELEVENLABS_API_KEY", "fake")
+    monkeypatch.setattr(tts, "ELEVEN_TTS_URL", fake_tts_url + "/v1/text-to-speech/{voice_id}")
+    monkeypatch.setattr(fake_tts, "FAKE_TTS_DELAY_MS", 20.0)
+    monkeypatch.setattr(fake_tts, "FAKE_TTS_MS_PER_CHAR", 0.5)
+    return tts.ElevenLabsClient(retries=0)
+
+
+class Recorder:
+    def __init__(self):
+        self.messages = []
+        self.frames = []
+
+    async def send_json(self, message):
+        self.messages.append(message)
+
+    async def send_bytes(self, data):
+        self.frames.append(data)
+
+
+def test_streamed_sentences_arrive_in_order(eleven):
+    text = "That sounds heavy. What part of it weighs most? Take your time, there's no rush."
+    sentences = ["That sounds heavy.", "What part of it weighs most?", "Take your time, there's no rush."]
+
+    async def run():
+        out = Recorder()
+        speaker = SentenceSpeaker(out.send_json, out.send_bytes, synthesize_fn=eleven.synthesize)
+        for i in range(0, len(text), 7):
+            speaker.feed(text[i : i + 7])
+            await asyncio.sleep(0.005)
+        count = await speaker.finish(text)
+        await eleven.aclose()
+        return count, out
+
+    count, out = asyncio.run(run())
+    assert count == len(sentences)
+    headers = [m for m in out.messages if m["type"] == "audio"]
+    assert [m["seq"] for m in headers] == [0, 1, 2]
+    assert [m["text"] for m in headers] == sentences
+    assert out.frames == [fake_tts.fake_mp3(s) for s in sentences]
+    assert [m["bytes"] for m in headers] == [len(f) for f in out.frames]
+    assert out.messages[-1] == {"type": "audio_end", "count": 3}
+
+
+def test_cancel_stops_pending_synthesis(eleven, monkeypatch):
+    monkeypatch.setattr(fake_tts, "FAKE_TTS_DELAY_MS", 300.0)
+    started = []
+
+    async def synthesize(text):
+        started.append(text)
+        return await eleven.synthesize(text)
+
+    async def run():
+        out = Recorder()
+        speaker = SentenceSpeaker(out.send_json, out.send_bytes, synthesize_fn=synthesize, parallel=1)
+        speaker.feed("First sentence here. Second one follows. Third and last. ")
+        await asyncio.sleep(0.05)
+        speaker.cancel()
+        await asyncio.sleep(0.4)
+        await eleven.aclose()
+        return out
+
+    out = asyncio.run(run())
+    # only the first sentence ever reached the TTS, and nothing was sent after cancel
+    assert started == ["First sentence here."]
+    assert out.frames == []
@@ -1,34 +1,201 @@
+import asyncio
+import logging
+import math
 import os
-import json
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-import requests
+from typing import AsyncIterator, Optional
 
-ELEVEN_TTS_URL = "https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+import httpx
 
-def elevenlabs_tts_to_mp3(text: str, out_mp3_path: Path) -> None:
-    # Generate speech audio via ElevenLabs and write an MP3 file.
-    api_key = os.getenv("ELEVENLABS_API_KEY")
-    voice_id = os.getenv("ELEVENLABS_VOICE_ID", "EXAVITQu4vr4xnSDxMaL")
-    model_id = os.getenv("ELEVENLABS_MODEL_ID", "eleven_turbo_v2")
-
-    if not api_key:
-        raise RuntimeError("Missing ELEVENLABS_API_KEY (set it in backend/.env).")
-
-    url = ELEVEN_TTS_URL.format(voice_id=voice_id)
-    headers = {
-        "xi-api-key": api_key,
-        "Accept": "audio/mpeg",
-        "Content-Type": "application/json",
-    }
+logger = logging.getLogger("uvicorn.error")
+
+# ELEVENLABS_BASE_URL can point at a local stand-in (see fake_tts.py)
+ELEVEN_BASE_URL = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io")
+ELEVEN_TTS_URL = ELEVEN_BASE_URL.rstrip("/") + "/v1/text-to-speech/{voice_id}"
+
+# requests in flight at once; the connection pool is sized to match so every
+# request can reuse a warm keep-alive connection instead of a new TLS handshake
+ELEVEN_MAX_CONCURRENCY = int(os.getenv("ELEVENLABS_MAX_CONCURRENCY", "8"))
+ELEVEN_KEEPALIVE_S = float(os.getenv("ELEVENLABS_KEEPALIVE_S", "60"))
+# HTTP/2 uses the h2 package from httpx[http2] (requirements.txt); without it, HTTP/1.1
+ELEVEN_HTTP2 = os.getenv("ELEVENLABS_HTTP2", "0") == "1"
+# per attempt, not per call
+ELEVEN_CONNECT_TIMEOUT_S = float(os.getenv("ELEVENLABS_CONNECT_TIMEOUT_S", "5"))
+ELEVEN_READ_TIMEOUT_S = float(os.getenv("ELEVENLABS_READ_TIMEOUT_S", "20"))
+ELEVEN_RETRIES = int(os.getenv("ELEVENLABS_RETRIES", "2"))
+ELEVEN_BACKOFF_S = float(os.getenv("ELEVENLABS_BACKOFF_S", "0.25"))
+# upper bound on any one wait, Retry-After included: a retry holds a concurrency slot
+ELEVEN_MAX_BACKOFF_S = float(os.getenv("ELEVENLABS_MAX_BACKOFF_S", "5"))
 
-    payload = {
-        "text": text,
-        "model_id": model_id,
+_RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+_CHUNK_SIZE = 16 * 1024
+
+
+def voice_config() -> dict:
+    # everything besides the text that determines the synthesized audio
+    return {
+        "voice_id": os.getenv("ELEVENLABS_VOICE_ID", "EXAVITQu4vr4xnSDxMaL"),
+        "model_id": os.getenv("ELEVENLABS_MODEL_ID", "eleven_turbo_v2"),
         "voice_settings": {"stability": 0.4, "similarity_boost": 0.75},
     }
 
-    r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
-    r.raise_for_status()
 
-    out_mp3_path.parent.mkdir(parents=True, exist_ok=True)
-    out_mp3_path.write_bytes(r.content)
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _retry_after_s(value: str) -> Optional[float]:
+    # delta-seconds or an HTTP date; None for anything else (negative, NaN, garbage)
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        seconds = (when - datetime.now(timezone.utc)).total_seconds()
+        return max(0.0, seconds)
+    if not math.isfinite(seconds) or seconds < 0:
+        return None
+    return seconds
+
+
+class ElevenLabsClient:
+    # One pooled async HTTP client for all TTS calls. Connections are kept alive
+    # between utterances, at most max_concurrency requests run at once, and a failed
+    # attempt (connect error, timeout, 429/5xx) is retried with jittered exponential
+    # backoff as long as no audio has been handed to the caller yet.
+
+    def __init__(
+        self,
+        max_concurrency: int = ELEVEN_MAX_CONCURRENCY,
+        http2: bool = ELEVEN_HTTP2,
+        retries: int = ELEVEN_RETRIES,
+        backoff_s: float = ELEVEN_BACKOFF_S,
+        max_backoff_s: float = ELEVEN_MAX_BACKOFF_S,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.retries = max(0, retries)
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max(0.0, max_backoff_s)
+        if http2 and not _http2_available():
+            logger.warning("ELEVENLABS_HTTP2=1 but h2 is not installed; using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self._client: Optional[httpx.AsyncClient] = None
+        # one cap for the client's lifetime; a recreated HTTP client must not start a
+        # fresh semaphore while requests still hold slots on the old one
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=ELEVEN_KEEPALIVE_S,
+                ),
+                timeout=httpx.Timeout(
+                    ELEVEN_READ_TIMEOUT_S, connect=ELEVEN_CONNECT_TIMEOUT_S, pool=ELEVEN_READ_TIMEOUT_S
+                ),
+            )
+        return self._client
+
+    def _request(self, text: str) -> httpx.Request:
+        api_key = os.getenv("ELEVENLABS_API_KEY")
+        if not api_key:
+            raise RuntimeError("Missing ELEVENLABS_API_KEY (set it in backend/.env).")
+        voice = voice_config()
+        return self._http().build_request(
+            "POST",
+            ELEVEN_TTS_URL.format(voice_id=voice["voice_id"]),
+            headers={"xi-api-key": api_key, "Accept": "audio/mpeg"},
+            json={"text": text, "model_id": voice["model_id"], "voice_settings": voice["voice_settings"]},
+        )
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        delay = _retry_after_s(response.headers.get("retry-after", "")) if response is not None else None
+        if delay is None:
+            delay = self.backoff_s * (2**attempt) * (0.5 + random.random())
+        return min(delay, self.max_backoff_s)
+
+    async def stream(self, text: str) -> AsyncIterator[bytes]:
+        # yields the mp3 body in chunks as it arrives
+        request = self._request(text)
+        async with self._slots:
+            attempt = 0
+            while True:
+                response = None
+                started = False
+                try:
+                    response = await self._http().send(request, stream=True)
+                    try:
+                        response.raise_for_status()
+                        async for chunk in response.aiter_bytes(_CHUNK_SIZE):
+                            started = True
+                            yield chunk
+                        return
+                    finally:
+                        await response.aclose()
+                except (httpx.TransportError, httpx.HTTPStatusError) as exc:
+                    retryable = isinstance(exc, httpx.TransportError) or response.status_code in _RETRY_STATUS
+                    if started or not retryable or attempt >= self.retries:
+                        raise
+                    delay = self._delay(attempt, response)
+                    reason = f"HTTP {response.status_code}" if response is not None else type(exc).__name__
+                    logger.warning("ElevenLabs attempt %d failed (%s); retrying in %.2fs", attempt + 1, reason, delay)
+                    attempt += 1
+                    await asyncio.sleep(delay)
+
+    async def synthesize(self, text: str) -> bytes:
+        audio = bytearray()
+        async for chunk in self.stream(text):
+            audio += chunk
+        return bytes(audio)
+
+    async def synthesize_to_file(self, text: str, out_mp3_path: Path) -> None:
+        # written chunk by chunk to a temp file and moved into place when complete
+        out_mp3_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out_mp3_path.with_suffix(out_mp3_path.suffix + ".part")
+        try:
+            with open(tmp, "wb") as f:
+                async for chunk in self.stream(text):
+                    f.write(chunk)
+            tmp.replace(out_mp3_path)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+eleven_client = ElevenLabsClient()
+
+
+async def _oneshot(call):
+    # the shared client belongs to the server's event loop; blocking callers get their own
+    client = ElevenLabsClient(max_concurrency=1)
+    try:
+        return await call(client)
+    finally:
+        await client.aclose()
+
+
+def elevenlabs_tts_to_mp3(text: str, out_mp3_path: Path) -> None:
+    # Blocking compatibility wrapper: generate speech via ElevenLabs and write an MP3 file.
+    asyncio.run(_oneshot(lambda client: client.synthesize_to_file(text, out_mp3_path)))
@@ -0,0 +1,215 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+
+from executors import run_io
+from tts import eleven_client, voice_config
+
+logger = logging.getLogger("uvicorn.error")
+
+TTS_CACHE_DIR = Path(os.getenv("TTS_CACHE_DIR", str(Path(__file__).parent / "tmp" / "tts_cache")))
+TTS_CACHE_MEMORY_MB = float(os.getenv("TTS_CACHE_MEMORY_MB", "32"))
+TTS_CACHE_DISK_MB = float(os.getenv("TTS_CACHE_DISK_MB", "512"))
+
+
+def cache_key(text: str, voice: Optional[dict] = None) -> str:
+    # content address: same text with the same voice/model/settings is the same audio
+    voice = voice if voice is not None else voice_config()
+    blob = json.dumps({"text": text, **voice}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class TtsCache:
+    # Two tiers of synthesized mp3 bytes keyed by cache_key():
+    #   memory: an LRU of bytes capped at memory_bytes; pinned keys (canned replies) are never evicted
+    #   disk:   one file per key under cache_dir, LRU by last access, capped at disk_bytes
+    # A miss synthesizes once even when several turns ask for the same text at the same time.
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        memory_bytes: int,
+        disk_bytes: int,
+        synthesize_fn: Callable[[str], Awaitable[bytes]] = eleven_client.synthesize,
+    ):
+        self.cache_dir = cache_dir
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._synthesize = synthesize_fn
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        self._pinned: set = set()
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_size = 0
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._counts = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+            "errors": 0,
+        }
+        self._load_disk_index()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.mp3"
+
+    def _load_disk_index(self) -> None:
+        if self.disk_bytes <= 0:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        files = sorted(self.cache_dir.glob("*.mp3"), key=lambda p: p.stat().st_mtime)
+        for path in files:
+            size = path.stat().st_size
+            self._disk[path.stem] = size
+            self._disk_size += size
+        self._evict_disk()
+
+    def _remember(self, key: str, audio: bytes) -> None:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = audio
+            self._memory_size += len(audio)
+            for old in list(self._memory):
+                if self._memory_size <= self.memory_bytes:
+                    break
+                if old in self._pinned or old == key:
+                    continue
+                self._memory_size -= len(self._memory.pop(old))
+                self._counts["memory_evictions"] += 1
+
+    def _evict_disk(self) -> None:
+        victims = []
+        with self._lock:
+            while self._disk_size > self.disk_bytes and self._disk:
+                old, size = self._disk.popitem(last=False)
+                self._disk_size -= size
+                self._counts["disk_evictions"] += 1
+                victims.append(old)
+        for old in victims:
+            self._path(old).unlink(missing_ok=True)
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key not in self._disk:
+                return None
+            self._disk.move_to_end(key)
+        path = self._path(key)
+        try:
+            audio = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._disk_size -= self._disk.pop(key, 0)
+            return None
+        return audio
+
+    def _write_disk(self, key: str, audio: bytes) -> None:
+        if self.disk_bytes <= 0 or len(audio) > self.disk_bytes:
+            return
+        path = self._path(key)
+        tmp = path.with_suffix(".part")
+        tmp.write_bytes(audio)
+        tmp.replace(path)
+        with self._lock:
+            self._disk_size += len(audio) - self._disk.pop(key, 0)
+            self._disk[key] = len(audio)
+        self._evict_disk()
+
+    def get_memory(self, text: str) -> Optional[bytes]:
+        # no I/O at all: used where even a disk read is too slow (safety replies)
+        key = cache_key(text)
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self._counts["memory_hits"] += 1
+        return audio
+
+    async def get(self, text: str) -> Optional[bytes]:
+        audio = self.get_memory(text)
+        if audio is not None:
+            return audio
+        key = cache_key(text)
+        audio = await run_io(self._read_disk, key)
+        if audio is not None:
+            self._counts["disk_hits"] += 1
+            self._remember(key, audio)
+        return audio
+
+    async def synthesize(self, text: str) -> bytes:
+        audio = await self.get(text)
+        if audio is not None:
+            return audio
+
+        key = cache_key(text)
+        task = self._inflight.get(key)
+        if task is None:
+            self._counts["misses"] += 1
+            # its own task, so a turn cancelled mid-synthesis (barge-in, disconnect)
+            # never cancels the other turns waiting on the same text
+            task = asyncio.create_task(self._fill(key, text))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._settle(key, done))
+        return await asyncio.shield(task)
+
+    def _settle(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # mark it retrieved; every waiter may have gone
+            task.exception()
+
+    async def _fill(self, key: str, text: str) -> bytes:
+        try:
+            audio = await self._synthesize(text)
+        except Exception:
+            self._counts["errors"] += 1
+            raise
+        self._remember(key, audio)
+        try:
+            await run_io(self._write_disk, key, audio)
+        except OSError:
+            logger.warning("could not write TTS cache entry %s", key, exc_info=True)
+        return audio
+
+    async def prewarm(self, texts: Iterable[str]) -> int:
+        # synthesizes (or loads from disk) each text and pins it in memory
+        ready = 0
+        for text in texts:
+            try:
+                await self.synthesize(text)
+            except Exception as exc:
+                logger.warning("TTS prewarm failed for %r: %s", text[:40], exc)
+                continue
+            with self._lock:
+                self._pinned.add(cache_key(text))
+            ready += 1
+        return ready
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            counts = dict(self._counts)
+            lookups = counts["memory_hits"] + counts["disk_hits"] + counts["misses"]
+            return {
+                **counts,
+                "hit_rate": (counts["memory_hits"] + counts["disk_hits"]) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_size,
+                "pinned": len(self._pinned),
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_size,
+            }
+
+
+tts_cache = TtsCache(TTS_CACHE_DIR, int(TTS_CACHE_MEMORY_MB * 1024 * 1024), int(TTS_CACHE_DISK_MB * 1024 * 1024))
@@ -0,0 +1,135 @@
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from classifiers import classify_intent_async, detect_emotion_async
+from llm import plan_response_json, stream_plan_json
+from mode import allowed_modes, choose_mode
+from renderer import PlanStreamRenderer, choose_opener, render_from_plan
+from safety import risk_level_from_text
+
+# stream the plan from the LLM and forward reflection/core text through ctx["emit"]
+PLAN_STREAMING = os.getenv("PLAN_STREAMING", "1") == "1"
+
+FALLBACK_REPLY = "I hear you. What feels like the hardest part of this right now?"
+
+StageFn = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class TurnPipeline:
+    # Stages declare which stages they depend on. run() starts every stage as soon
+    # as its dependencies are done, so independent ones (intent and emotion) overlap.
+    # A stage's result lands in ctx[name] and its wall time in ctx["timings"][name];
+    # stages already present in ctx are treated as done, so a turn can be run in steps.
+
+    def __init__(self):
+        self._stages: Dict[str, Tuple[StageFn, Tuple[str, ...]]] = {}
+
+    def stage(self, name: str, deps: Iterable[str] = ()) -> Callable[[StageFn], StageFn]:
+        def register(fn: StageFn) -> StageFn:
+            self._stages[name] = (fn, tuple(deps))
+            return fn
+
+        return register
+
+    def _needed(self, targets: Iterable[str], ctx: Dict[str, Any]) -> List[str]:
+        order: List[str] = []
+
+        def visit(name: str) -> None:
+            if name in order or name in ctx:
+                return
+            for dep in self._stages[name][1]:
+                visit(dep)
+            order.append(name)
+
+        for target in targets:
+            visit(target)
+        return order
+
+    async def run(self, ctx: Dict[str, Any], targets: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        timings = ctx.setdefault("timings", {})
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(name: str) -> None:
+            fn, deps = self._stages[name]
+            pending = [tasks[d] for d in deps if d in tasks]
+            if pending:
+                await asyncio.gather(*pending)
+            start = time.perf_counter()
+            ctx[name] = await fn(ctx)
+            timings[name] = (time.perf_counter() - start) * 1000
+
+        for name in self._needed(targets or list(self._stages), ctx):
+            tasks[name] = asyncio.create_task(run_stage(name))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        return ctx
+
+
+turn_pipeline = TurnPipeline()
+
+
+@turn_pipeline.stage("risk")
+async def _risk(ctx: Dict[str, Any]) -> str:
+    return risk_level_from_text(ctx["text"])
+
+
+@turn_pipeline.stage("intent")
+async def _intent(ctx: Dict[str, Any]) -> str:
+    return await classify_intent_async(ctx["text"])
+
+
+@turn_pipeline.stage("emotion")
+async def _emotion(ctx: Dict[str, Any]) -> str:
+    return await detect_emotion_async(ctx["text"])
+
+
+@turn_pipeline.stage("mode", deps=("intent", "emotion"))
+async def _mode(ctx: Dict[str, Any]) -> str:
+    allowed = allowed_modes(ctx["intent"], ctx["emotion"])
+    return choose_mode(allowed, ctx["last_modes"], seed=f"{ctx['session_id']}:{ctx['turn_index']}")
+
+
+@turn_pipeline.stage("opener", deps=("mode",))
+async def _opener(ctx: Dict[str, Any]) -> str:
+    # seeded from the turn rather than the plan so it can be sent before the LLM answers
+    seed = f"{ctx['mode']}|{ctx['intent']}|{ctx['emotion']}|{ctx['session_id']}:{ctx['turn_index']}"
+    return choose_opener(ctx["mode"], ctx["last_openers"], seed)
+
+
+@turn_pipeline.stage("plan", deps=("mode", "opener"))
+async def _plan(ctx: Dict[str, Any]) -> Dict[str, str]:
+    args = (ctx["history"], ctx["text"], ctx["intent"], ctx["emotion"], ctx["mode"], ctx["disallowed_openers"])
+    emit = ctx.get("emit")
+    if not PLAN_STREAMING or emit is None:
+        return await plan_response_json(*args)
+
+    preview = PlanStreamRenderer(ctx["mode"], ctx["opener"])
+    ctx["preview"] = preview
+    await emit(preview.start())
+
+    plan: Dict[str, str] = {}
+    async for event in stream_plan_json(*args):
+        if event["type"] == "field":
+            delta = preview.feed(event["key"], event["delta"], event["done"])
+            if delta:
+                await emit(delta)
+        elif event["type"] == "plan":
+            plan = event["plan"]
+    return plan
+
+
+@turn_pipeline.stage("render", deps=("plan",))
+async def _render(ctx: Dict[str, Any]) -> str:
+    # a copy, because render_from_plan appends the opener; run_turn records it on the
+    # session (Session.add_opener) once the reply has gone out
+    text = render_from_plan(
+        ctx["plan"], ctx["mode"], ctx["intent"], ctx["emotion"], list(ctx["last_openers"]), opener=ctx["opener"]
+    ).strip()
+    return text or FALLBACK_REPLY
@@ -1,5 +1,14 @@
+import io
 import subprocess
+import threading
 from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from faster_whisper import decode_audio
+
+SAMPLE_RATE = 16000
+
 
 def to_wav_16k_mono(src_path: Path, dst_path: Path) -> None:
     # converts browser audio to WAV 16kHz mono for Whisper. Requires ffmpeg.
@@ -12,3 +21,151 @@ def to_wav_16k_mono(src_path: Path, dst_path: Path) -> None:
         str(dst_path),
     ]
     subprocess.run(cmd, check=True, capture_output=True)
+
+
+def _ffmpeg_decode_bytes(data: bytes, sample_rate: int) -> np.ndarray:
+    # same conversion as to_wav_16k_mono but through stdin/stdout, no temp files
+    cmd = [
+        "ffmpeg", "-nostdin", "-loglevel", "error",
+        "-i", "pipe:0",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-vn",
+        "-f", "f32le",
+        "pipe:1",
+    ]
+    proc = subprocess.run(cmd, input=data, check=True, capture_output=True)
+    return np.frombuffer(proc.stdout, dtype=np.float32)
+
+
+def decode_audio_bytes(data: bytes, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    # decodes browser audio (webm/ogg/mp4/wav) straight to a float32 mono array.
+    # PyAV runs in-process so there is no fork/exec; the ffmpeg pipe covers
+    # containers PyAV can't open from memory.
+    if not data:
+        return np.zeros(0, dtype=np.float32)
+    try:
+        return decode_audio(io.BytesIO(data), sampling_rate=sample_rate)
+    except Exception:
+        return _ffmpeg_decode_bytes(data, sample_rate)
+
+
+class StreamDecoder:
+    # One long-lived ffmpeg per streaming session. Container chunks from the
+    # browser MediaRecorder are written to stdin as they arrive and a reader
+    # thread appends the decoded PCM, so decode work tracks new audio only.
+    # If ffmpeg is missing or dies, the raw bytes are re-decoded in memory.
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self._raw = bytearray()
+        self._pcm = bytearray()
+        self._lock = threading.Lock()
+        self._proc: Optional[subprocess.Popen] = None
+        self._reader: Optional[threading.Thread] = None
+        self._live = False
+        self._closed = False
+        self._fallback = np.zeros(0, dtype=np.float32)
+        self._fallback_len = 0
+
+        cmd = [
+            "ffmpeg", "-nostdin", "-loglevel", "error",
+            "-fflags", "nobuffer",
+            "-probesize", "2048",
+            "-analyzeduration", "0",
+            "-i", "pipe:0",
+            "-ac", "1",
+            "-ar", str(sample_rate),
+            "-vn",
+            "-f", "f32le",
+            "-flush_packets", "1",
+            "pipe:1",
+        ]
+        try:
+            self._proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                bufsize=0,
+            )
+        except OSError:
+            return
+
+        self._live = True
+        self._reader = threading.Thread(target=self._read_loop, name="stream-decoder", daemon=True)
+        self._reader.start()
+
+    def _read_loop(self) -> None:
+        try:
+            while True:
+                chunk = self._proc.stdout.read(8192)
+                if not chunk:
+                    break
+                with self._lock:
+                    self._pcm.extend(chunk)
+        except (OSError, ValueError):
+            pass
+
+    def feed(self, data: bytes) -> None:
+        if not data or self._closed:
+            return
+        # raw bytes are kept (compressed, small) so the fallback can take over mid-stream
+        self._raw.extend(data)
+        if not self._live:
+            return
+        try:
+            self._proc.stdin.write(data)
+        except (OSError, ValueError):
+            self._live = False
+            self._stop_process()
+
+    def _decoded_raw(self) -> np.ndarray:
+        if self._fallback_len != len(self._raw):
+            try:
+                self._fallback = decode_audio_bytes(bytes(self._raw), self.sample_rate)
+            except Exception:
+                pass
+            self._fallback_len = len(self._raw)
+        return self._fallback
+
+    def sample_count(self) -> int:
+        if not self._live:
+            return len(self._decoded_raw())
+        with self._lock:
+            return len(self._pcm) // 4
+
+    def samples(self, start: int = 0) -> np.ndarray:
+        if not self._live:
+            return self._decoded_raw()[start:]
+        with self._lock:
+            end = len(self._pcm) - len(self._pcm) % 4
+            chunk = bytes(self._pcm[start * 4 : end])
+        return np.frombuffer(chunk, dtype=np.float32)
+
+    def finish(self, timeout: float = 2.0) -> None:
+        # end of input: let ffmpeg flush its tail so samples() covers everything fed
+        if self._live:
+            try:
+                self._proc.stdin.close()
+            except OSError:
+                pass
+            self._reader.join(timeout)
+        self._closed = True
+
+    def close(self) -> None:
+        self._closed = True
+        self._stop_process()
+
+    def _stop_process(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        if proc.poll() is None:
+            proc.kill()
+        for pipe in (proc.stdin, proc.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+        proc.wait()